@@ -25,208 +25,343 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
-# ---- Load data ----
-@st.cache_data
-def load_data(path: str = "ed_visits.csv") -> pd.DataFrame:
-    df = pd.read_csv(path, parse_dates=["arrival_datetime"])
-    df["arrival_date"] = pd.to_datetime(df["arrival_datetime"]).dt.date
-    return df
-
-df = load_data()
-
-# ---- Header ----
-st.title("ED Flow Monitor: Wait Times, LOS, and LWBS")
-st.write(
-    "For ED operations leaders to monitor crowding and identify drivers of delays (wait time, length of stay, and LWBS)."
+import os
+import sys
+import time
+
+# shared modules live at the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from cache import LRUCache
+from cube import cube_cells
+from filters import FilteredView, filter_key, filter_tail
+from ingest import VisitStore
+from metrics import FilterResult, daily_trend, kpi_totals
+from plots import FigureCache, FigureLog, frame_digest
+from profiler import RerunProfiler, waterfall_figure
+from sections import (
+    bar_figure, bar_frame, census_figure, census_frame, filter_result, heat_figure, hist_figure, insight_lines,
+    scatter_density_figure, scatter_points_figure, sweep_figure, trend_figure,
 )
-
-# ---- Sidebar filters ----
-st.sidebar.header("Filters")
-
-min_date = df["arrival_date"].min()
-max_date = df["arrival_date"].max()
-
-date_range = st.sidebar.date_input(
-    "Date range",
-    value=(min_date, max_date),
-    min_value=min_date,
-    max_value=max_date,
+from sketch import sketch_quantiles, visit_sketch
+
+# ---- Rerun profiler (opt-in) ----
+# ED_PROFILE=1 turns it on by default; the sidebar toggle overrides per session.
+# The toggles are read from session_state here so the load section is timed too.
+PROFILE_DEFAULT = os.environ.get("ED_PROFILE", "0") == "1"
+profiler = RerunProfiler(
+    enabled=st.session_state.get("profile", PROFILE_DEFAULT),
+    cprofile=st.session_state.get("profile_cprofile", False),
 )
 
-# Normalize date_range output
-if isinstance(date_range, tuple) and len(date_range) == 2:
-    start_date, end_date = date_range
-else:
-    start_date, end_date = min_date, max_date
-
-triage_options = sorted(df["triage_level"].unique().tolist())
-triage_sel = st.sidebar.multiselect("Triage level", triage_options, default=triage_options)
-
-complaint_options = sorted(df["chief_complaint"].unique().tolist())
-complaint_sel = st.sidebar.multiselect("Chief complaint", complaint_options, default=complaint_options)
-
-mode_options = sorted(df["arrival_mode"].unique().tolist())
-mode_sel = st.sidebar.multiselect("Arrival mode", mode_options, default=mode_options)
-
-pod_options = sorted(df["pod"].unique().tolist())
-pod_sel = st.sidebar.multiselect("Pod", pod_options, default=pod_options)
-
-metric_choice = st.sidebar.selectbox(
-    "Primary metric to emphasize",
-    ["door_to_provider_min", "length_of_stay_min", "bed_occupancy_pct"],
-    index=0,
-)
-
-# ---- Apply filters ----
-mask = (
-    (df["arrival_date"] >= start_date)
-    & (df["arrival_date"] <= end_date)
-    & (df["triage_level"].isin(triage_sel))
-    & (df["chief_complaint"].isin(complaint_sel))
-    & (df["arrival_mode"].isin(mode_sel))
-    & (df["pod"].isin(pod_sel))
-)
-dff = df.loc[mask].copy()
-
-# ---- KPI calculations ----
-def safe_mean(series: pd.Series) -> float:
-    return float(series.mean()) if len(series) else float("nan")
-
-total_visits = len(dff)
-avg_dtp = safe_mean(dff["door_to_provider_min"])
-avg_los = safe_mean(dff["length_of_stay_min"])
-avg_occ = safe_mean(dff["bed_occupancy_pct"])
-lwbs_rate = (dff["disposition"].eq("Left Without Being Seen").mean() * 100) if total_visits else 0.0
-admit_rate = (dff["disposition"].eq("Admitted").mean() * 100) if total_visits else 0.0
-
-k1, k2, k3, k4, k5, k6 = st.columns(6)
-k1.markdown(f"<div class='kpi-card'><div class='muted'>Visits</div><div style='font-size:1.6rem;'>{total_visits:,}</div></div>", unsafe_allow_html=True)
-k2.markdown(f"<div class='kpi-card'><div class='muted'>Avg Door→Provider (min)</div><div style='font-size:1.6rem;'>{avg_dtp:,.1f}</div></div>", unsafe_allow_html=True)
-k3.markdown(f"<div class='kpi-card'><div class='muted'>Avg LOS (min)</div><div style='font-size:1.6rem;'>{avg_los:,.1f}</div></div>", unsafe_allow_html=True)
-k4.markdown(f"<div class='kpi-card'><div class='muted'>Avg Occupancy (%)</div><div style='font-size:1.6rem;'>{avg_occ:,.1f}</div></div>", unsafe_allow_html=True)
-k5.markdown(f"<div class='kpi-card'><div class='muted'>LWBS Rate</div><div style='font-size:1.6rem;'>{lwbs_rate:,.1f}%</div></div>", unsafe_allow_html=True)
-k6.markdown(f"<div class='kpi-card'><div class='muted'>Admission Rate</div><div style='font-size:1.6rem;'>{admit_rate:,.1f}%</div></div>", unsafe_allow_html=True)
-
-st.markdown("")
-
-# ---- Plotly theme ----
-px.defaults.template = "plotly_white"
-
-# ---- Charts (4+ distinct types) ----
-c1, c2 = st.columns([1.25, 1])
-
-# 1) Line chart: trend by day (distinct question: trend)
-trend = (
-    dff.groupby("arrival_date", as_index=False)
-       .agg(
-           avg_door_to_provider=("door_to_provider_min", "mean"),
-           avg_los=("length_of_stay_min", "mean"),
-           avg_occ=("bed_occupancy_pct", "mean"),
-           visits=("visit_id", "count"),
-       )
-       .sort_values("arrival_date")
-)
+# CSV, Parquet, Feather or a directory of part-* shards; the format is sniffed on load
+DATA_PATH = os.environ.get("ED_VISITS_PATH", "ed_visits.csv")
 
-y_map = {
-    "door_to_provider_min": ("avg_door_to_provider", "Avg Door→Provider (min)"),
-    "length_of_stay_min": ("avg_los", "Avg LOS (min)"),
-    "bed_occupancy_pct": ("avg_occ", "Avg Occupancy (%)"),
-}
-y_col, y_label = y_map[metric_choice]
-
-fig_line = px.line(
-    trend,
-    x="arrival_date",
-    y=y_col,
-    markers=True,
-    title=f"Daily Trend: {y_label}",
-)
-fig_line.update_layout(margin=dict(l=10, r=10, t=50, b=10), height=380)
-c1.plotly_chart(fig_line, use_container_width=True)
-
-# 2) Bar chart: comparison by chief complaint (distinct question: which categories drive LOS/waits)
-metric_for_bar = st.selectbox(
-    "Bar metric (comparison)",
-    ["door_to_provider_min", "length_of_stay_min", "bed_occupancy_pct"],
-    index=1,
-)
-bar_df = (
-    dff.groupby("chief_complaint", as_index=False)
-       .agg(value=(metric_for_bar, "mean"), visits=("visit_id", "count"))
-       .sort_values("value", ascending=False)
-)
-
-fig_bar = px.bar(
-    bar_df,
-    x="chief_complaint",
-    y="value",
-    hover_data=["visits"],
-    title=f"Comparison by Chief Complaint: Avg {metric_for_bar}",
-)
-fig_bar.update_layout(margin=dict(l=10, r=10, t=50, b=10), height=380)
-c2.plotly_chart(fig_bar, use_container_width=True)
-
-c3, c4 = st.columns([1, 1])
-
-# 3) Scatter: relationship occupancy vs wait (distinct question: is crowding linked to delays)
-sample = dff.sample(min(len(dff), 2500), random_state=7) if len(dff) else dff
-fig_scatter = px.scatter(
-    sample,
-    x="bed_occupancy_pct",
-    y="door_to_provider_min",
-    color="triage_level",
-    title="Crowding Relationship: Occupancy vs Door→Provider",
-    opacity=0.65,
-    hover_data=["chief_complaint", "arrival_mode", "pod", "disposition"],
-)
-fig_scatter.update_layout(margin=dict(l=10, r=10, t=50, b=10), height=380)
-c3.plotly_chart(fig_scatter, use_container_width=True)
-
-# 4) Histogram: distribution (distinct question: outliers vs broad shift)
-fig_hist = px.histogram(
-    dff,
-    x="length_of_stay_min",
-    nbins=40,
-    title="LOS Distribution (min)",
-)
-fig_hist.update_layout(margin=dict(l=10, r=10, t=50, b=10), height=380)
-c4.plotly_chart(fig_hist, use_container_width=True)
-
-# Optional 5th chart: heatmap of mean wait by day/hour (nice for staffing)
-st.markdown("### Staffing Signal: When are waits highest?")
-heat = (
-    dff.assign(dow=pd.to_datetime(dff["arrival_datetime"]).dt.day_name())
-       .groupby(["dow", "hour"], as_index=False)
-       .agg(mean_wait=("door_to_provider_min", "mean"), visits=("visit_id", "count"))
-)
-
-# Order days
-day_order = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-heat["dow"] = pd.Categorical(heat["dow"], categories=day_order, ordered=True)
-heat = heat.sort_values(["dow", "hour"])
-
-pivot = heat.pivot(index="dow", columns="hour", values="mean_wait")
-fig_heat = px.imshow(
-    pivot,
-    aspect="auto",
-    title="Mean Door→Provider (min) by Day of Week × Hour",
-)
-fig_heat.update_layout(margin=dict(l=10, r=10, t=50, b=10), height=420)
-st.plotly_chart(fig_heat, use_container_width=True)
-
-# ---- Insight callouts (helps presentation) ----
-st.markdown("### Quick Insights (auto-generated)")
-if len(dff) >= 50:
-    # occupancy threshold insight
-    high_occ = dff[dff["bed_occupancy_pct"] >= 85]
-    low_occ = dff[dff["bed_occupancy_pct"] < 85]
-    if len(high_occ) > 30 and len(low_occ) > 30:
-        delta = high_occ["door_to_provider_min"].mean() - low_occ["door_to_provider_min"].mean()
-        st.write(f"- When **occupancy ≥ 85%**, average door→provider is **{delta:,.1f} minutes higher** than when occupancy < 85%.")
-    # flu wave insight if present
-    if "flu_wave_flag" in dff.columns and dff["flu_wave_flag"].mean() > 0.05:
-        fw = dff[dff["flu_wave_flag"] == 1]["door_to_provider_min"].mean()
-        nf = dff[dff["flu_wave_flag"] == 0]["door_to_provider_min"].mean()
-        st.write(f"- During the **flu-wave window**, average door→provider is **{(fw - nf):,.1f} minutes higher** than outside the window.")
-else:
-    st.write("- Not enough filtered data to compute robust insights. Try widening filters.")
+# ---- Load data ----
+# cache_resource shares one store across reruns and sessions instead of handing
+# each rerun a deserialized copy; everything below treats its frames as read-only.
+# The store holds the time-sorted visits (declared dtype schema), the day and
+# bitmap indexes used by the filters, and the (date, hour, triage, complaint,
+# mode, pod) cube the trend, bar and heatmap charts roll up.
+@st.cache_resource
+def load_store(path: str = DATA_PATH) -> VisitStore:
+    return VisitStore(path)
+
+# Default interval for the live-refresh fragment (KPI row + trend only)
+LIVE_REFRESH_S = int(os.environ.get("ED_LIVE_REFRESH_S", "30"))
+
+# Scatter panel: points up to this many filtered visits, a binned density above it
+SCATTER_MAX_POINTS = 2500
+SCATTER_DENSITY_ROWS = int(os.environ.get("ED_SCATTER_DENSITY_ROWS", "50000"))
+
+# Largest figure JSON a chart may send; bigger ones switch to their aggregated fallback
+FIGURE_BUDGET_KB = int(os.environ.get("ED_FIGURE_BUDGET_KB", "512"))
+
+# Filtered rows + aggregates per normalized filter state, shared by all sessions.
+# Rows are kept as a packed mask (filters.PackedRows), at most one bit per visit
+# per entry: about 6 MB per entry at 50M visits.
+FILTER_CACHE_ENTRIES = 64
+FILTER_CACHE_TTL_S = 3600
+
+@st.cache_resource
+def filter_cache(path: str = DATA_PATH) -> LRUCache:
+    return LRUCache(max_entries=FILTER_CACHE_ENTRIES, ttl=FILTER_CACHE_TTL_S)
+
+# Built figures keyed by their inputs + options, so a rerun only rebuilds charts whose inputs changed
+FIGURE_CACHE_ENTRIES = 128
+
+@st.cache_resource
+def figure_cache(path: str = DATA_PATH) -> FigureCache:
+    return FigureCache(max_entries=FIGURE_CACHE_ENTRIES)
+
+# Everything up to the profile panel runs inside try / finally, so st.rerun(),
+# st.stop() or an exception still closes the last span and disables cProfile.
+try:
+    profiler.mark("load")
+    store = load_store()
+    # Appended visits are parsed from the tail of the source only; a no-op stat when nothing changed
+    store.refresh()
+    snapshot = store.snapshot()
+    df, day_index, bitmap_index = snapshot.df, snapshot.day_index, snapshot.bitmap_index
+
+    # ---- Header ----
+    profiler.mark("widgets")
+    st.title("ED Flow Monitor: Wait Times, LOS, and LWBS")
+    st.write(
+        "For ED operations leaders to monitor crowding and identify drivers of delays (wait time, length of stay, and LWBS)."
+    )
+
+    # ---- Sidebar filters ----
+    st.sidebar.header("Filters")
+
+    min_date = pd.Timestamp(day_index.days[0]).date()
+    max_date = pd.Timestamp(day_index.days[-1]).date()
+
+    date_range = st.sidebar.date_input(
+        "Date range",
+        value=(min_date, max_date),
+        min_value=min_date,
+        max_value=max_date,
+    )
+
+    # Normalize date_range output
+    if isinstance(date_range, tuple) and len(date_range) == 2:
+        start_date, end_date = date_range
+    else:
+        start_date, end_date = min_date, max_date
+
+    triage_options = sorted(bitmap_index.bitmaps["triage_level"])
+    triage_sel = st.sidebar.multiselect("Triage level", triage_options, default=triage_options)
+
+    complaint_options = sorted(bitmap_index.bitmaps["chief_complaint"])
+    complaint_sel = st.sidebar.multiselect("Chief complaint", complaint_options, default=complaint_options)
+
+    mode_options = sorted(bitmap_index.bitmaps["arrival_mode"])
+    mode_sel = st.sidebar.multiselect("Arrival mode", mode_options, default=mode_options)
+
+    pod_options = sorted(bitmap_index.bitmaps["pod"])
+    pod_sel = st.sidebar.multiselect("Pod", pod_options, default=pod_options)
+
+    metric_choice = st.sidebar.selectbox(
+        "Primary metric to emphasize",
+        ["door_to_provider_min", "length_of_stay_min", "bed_occupancy_pct"],
+        index=0,
+    )
+
+    live = st.sidebar.toggle("Live refresh (wall display)", value=False)
+    live_every = st.sidebar.number_input(
+        "Refresh every (s)", min_value=5, value=LIVE_REFRESH_S, step=5, disabled=not live,
+    )
+
+    show_debug = st.sidebar.checkbox("Show debug panel", value=False)
+
+    profiling = st.sidebar.toggle("Profile reruns", value=PROFILE_DEFAULT, key="profile")
+    st.sidebar.checkbox("Capture cProfile", value=False, key="profile_cprofile", disabled=not profiling)
+
+    # ---- Apply filters ----
+    profiler.mark("filter")
+    selections = {
+        "triage_level": triage_sel,
+        "chief_complaint": complaint_sel,
+        "arrival_mode": mode_sel,
+        "pod": pod_sel,
+    }
+
+    def compute_filter_result() -> FilterResult:
+        return filter_result(snapshot, start_date, end_date, selections)
+
+    # Toggling back to a previous selection (or only changing a metric picker) is a cache hit
+    fkey = (snapshot.version, filter_key(bitmap_index, start_date, end_date, selections))
+    result = filter_cache().get_or_compute(
+        fkey,
+        compute_filter_result,
+    )
+    # Sections below read the columns they need through the view; nothing is copied up front
+    dff = FilteredView(df, result.rows)
+
+    # ---- Plotly theme ----
+    px.defaults.template = "plotly_white"
+
+    # Build time / payload of every chart this rerun, for the debug panel
+    figures = FigureLog(budget_bytes=FIGURE_BUDGET_KB * 1024, cache=figure_cache())
+
+    # ---- KPI row + trend (live fragment) ----
+    # With live refresh on, only this fragment reruns on a timer: it ingests the
+    # source tail, folds the newly arrived visits into the cached KPI totals and
+    # re-rolls just the trend days they touch from the (already merged) cube.
+    # The trend is drawn into an st.empty slot in the chart row, so each fragment
+    # rerun replaces it; the bar chart next to it stays in the main script.
+    base_rows, base_epoch = len(df), snapshot.epoch
+    live_end = None if end_date >= max_date else end_date  # an untouched end date follows new days
+
+    @st.fragment(run_every=live_every if live else None)
+    def kpi_and_trend(trend_slot) -> None:
+        profiler.mark("kpis")
+        kpis, trend, sketch = result.kpis, result.trend, result.sketch
+        if live:
+            t0 = time.perf_counter()
+            store.refresh()
+            snap = store.snapshot()
+            if snap.epoch != base_epoch:
+                st.rerun()  # rows were reloaded or re-sorted; positions no longer line up
+            tail = filter_tail(snap.df, base_rows, start_date, live_end, selections)
+            kpis = kpis.merge(kpi_totals(tail))
+            sketch = sketch + visit_sketch(tail)
+            if len(tail):
+                first = max(tail["arrival_date"].min().date(), start_date)
+                last = pd.Timestamp(snap.day_index.days[-1]).date() if live_end is None else live_end
+                latest = daily_trend(cube_cells(snap.cube, first, last, selections))
+                trend = pd.concat([trend[trend["arrival_date"] < pd.Timestamp(first)], latest], ignore_index=True)
+            live_ms = (time.perf_counter() - t0) * 1e3
+
+        # ---- KPI calculations ----
+        total_visits = kpis.visits
+        avg_dtp = kpis.avg_dtp
+        avg_los = kpis.avg_los
+        avg_occ = kpis.avg_occ
+        lwbs_rate = kpis.lwbs_rate
+        admit_rate = kpis.admit_rate
+        # p50 / p90 / p95 from the merged sketches (relative error <= SKETCH_ALPHA)
+        pct = sketch_quantiles(sketch)
+
+        def pct_line(metric: str) -> str:
+            p = pct.loc[metric]
+            if p.isna().all():
+                return ""
+            return f"<div class='muted'>p50 {p['p50']:,.0f} · p90 {p['p90']:,.0f} · p95 {p['p95']:,.0f}</div>"
+
+        k1, k2, k3, k4, k5, k6 = st.columns(6)
+        k1.markdown(f"<div class='kpi-card'><div class='muted'>Visits</div><div style='font-size:1.6rem;'>{total_visits:,}</div></div>", unsafe_allow_html=True)
+        k2.markdown(f"<div class='kpi-card'><div class='muted'>Avg Door→Provider (min)</div><div style='font-size:1.6rem;'>{avg_dtp:,.1f}</div>{pct_line('door_to_provider_min')}</div>", unsafe_allow_html=True)
+        k3.markdown(f"<div class='kpi-card'><div class='muted'>Avg LOS (min)</div><div style='font-size:1.6rem;'>{avg_los:,.1f}</div>{pct_line('length_of_stay_min')}</div>", unsafe_allow_html=True)
+        k4.markdown(f"<div class='kpi-card'><div class='muted'>Avg Occupancy (%)</div><div style='font-size:1.6rem;'>{avg_occ:,.1f}</div></div>", unsafe_allow_html=True)
+        k5.markdown(f"<div class='kpi-card'><div class='muted'>LWBS Rate</div><div style='font-size:1.6rem;'>{lwbs_rate:,.1f}%</div></div>", unsafe_allow_html=True)
+        k6.markdown(f"<div class='kpi-card'><div class='muted'>Admission Rate</div><div style='font-size:1.6rem;'>{admit_rate:,.1f}%</div></div>", unsafe_allow_html=True)
+
+        if live:
+            st.caption(
+                f"Live: +{len(tail):,} visits since the last full refresh · "
+                f"refreshed in {live_ms:,.1f} ms at {time.strftime('%H:%M:%S')}"
+            )
+        else:
+            st.markdown("")
+
+        # 1) Line chart: trend by day (distinct question: trend)
+        profiler.mark("trend")
+        fig_line = figures.build(
+            "trend", lambda: trend_figure(trend, metric_choice), key=(frame_digest(trend), metric_choice),
+        )
+        trend_slot.plotly_chart(fig_line, use_container_width=True)
+
+    kpi_row = st.container()
+
+    # ---- Charts (4+ distinct types) ----
+    c1, c2 = st.columns([1.25, 1])
+    with kpi_row:
+        kpi_and_trend(c1.empty())
+
+    # 2) Bar chart: comparison by chief complaint (distinct question: which categories drive LOS/waits)
+    profiler.mark("bar")
+    metric_for_bar = st.selectbox(
+        "Bar metric (comparison)",
+        ["door_to_provider_min", "length_of_stay_min", "bed_occupancy_pct"],
+        index=1,
+    )
+    bar_df = bar_frame(result.by_complaint, metric_for_bar)
+    fig_bar = figures.build(
+        "bar", lambda: bar_figure(bar_df, metric_for_bar), key=(frame_digest(bar_df), metric_for_bar),
+    )
+    c2.plotly_chart(fig_bar, use_container_width=True)
+
+    c3, c4 = st.columns([1, 1])
+
+    # 3) Scatter: relationship occupancy vs wait (distinct question: is crowding linked to delays)
+    profiler.mark("scatter")
+    # Too many visits for markers to mean anything: go straight to the density
+    if len(dff) > SCATTER_DENSITY_ROWS:
+        fig_scatter = figures.build("scatter", lambda: scatter_density_figure(dff), key=("density", fkey))
+    else:
+        fig_scatter = figures.build(
+            "scatter",
+            lambda: scatter_points_figure(dff, SCATTER_MAX_POINTS),
+            fallback=lambda: scatter_density_figure(dff),
+            key=("points", fkey),
+        )
+    c3.plotly_chart(fig_scatter, use_container_width=True)
+
+    # 4) Histogram: distribution (distinct question: outliers vs broad shift)
+    profiler.mark("histogram")
+    fig_hist = figures.build("histogram", lambda: hist_figure(dff), key=fkey)
+    c4.plotly_chart(fig_hist, use_container_width=True)
+
+    # Optional 5th chart: heatmap of mean wait by day/hour (nice for staffing)
+    profiler.mark("heatmap")
+    st.markdown("### Staffing Signal: When are waits highest?")
+    pivot = result.heat
+    fig_heat = figures.build("heatmap", lambda: heat_figure(pivot), key=frame_digest(pivot))
+    st.plotly_chart(fig_heat, use_container_width=True)
+
+    # Census: patients in the department over time (from arrival + LOS, not the occupancy snapshot)
+    profiler.mark("census")
+    st.markdown("### Census: Patients in the Department by Pod")
+    census_step = st.radio("Census resolution", ["Hourly", "15 min"], horizontal=True)
+    step_min = 60 if census_step == "Hourly" else 15
+
+    def census_chart(step_min: int):
+        census = filter_cache().get_or_compute(
+            ("census", step_min, fkey),
+            lambda: census_frame(snapshot, start_date, end_date, selections, step_min),
+        )
+        return census_figure(census)
+
+    # A long range at 15 min resolution can exceed the budget; hourly is the fallback
+    fig_census = figures.build(
+        "census",
+        lambda: census_chart(step_min),
+        fallback=(lambda: census_chart(60)) if step_min != 60 else None,
+        key=(step_min, fkey),
+    )
+    st.plotly_chart(fig_census, use_container_width=True)
+
+    # ---- Insight callouts (helps presentation) ----
+    profiler.mark("insights")
+    st.markdown("### Quick Insights (auto-generated)")
+
+    # Crowding: the door-to-provider gap at every occupancy cut, from one sort of the filtered rows
+    occ_threshold = st.slider("Occupancy threshold (%)", min_value=60, max_value=98, value=85)
+    sweep = result.sweep
+    fig_sweep = figures.build(
+        "occupancy sweep", lambda: sweep_figure(sweep, occ_threshold), key=(frame_digest(sweep), occ_threshold),
+    )
+    st.plotly_chart(fig_sweep, use_container_width=True)
+
+    # Door-to-provider inside vs outside each split, computed once per filter state (result.insights)
+    if len(dff) >= 50:
+        for line in insight_lines(result, occ_threshold):
+            st.write(line)
+    else:
+        st.write("- Not enough filtered data to compute robust insights. Try widening filters.")
+finally:
+    profiler.stop()
+
+# ---- Rerun profile ----
+if profiler.enabled:
+    with st.expander("Rerun profile", expanded=True):
+        spans = profiler.frame()
+        st.caption(f"Sections total {spans['ms'].sum():,.1f} ms (rendering this panel not included)")
+        st.plotly_chart(waterfall_figure(spans), use_container_width=True)
+        stats_text = profiler.cprofile_text()
+        if stats_text is not None:
+            st.code(stats_text, language="text")
+
+# ---- Debug panel ----
+if show_debug:
+    with st.sidebar.expander("Debug", expanded=True):
+        stats = filter_cache().stats()
+        st.write(
+            f"Filter cache: {stats['hits']} hits / {stats['misses']} misses "
+            f"({stats['hit_rate']:.0%}), {stats['entries']}/{FILTER_CACHE_ENTRIES} entries"
+        )
+        st.write(f"Figures (budget {FIGURE_BUDGET_KB:,} KB each):")
+        st.dataframe(figures.frame().round(1), hide_index=True)
+        st.write("Figure cache (all sessions):")
+        st.dataframe(figure_cache().stats().round(2), hide_index=True)
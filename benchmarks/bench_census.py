@@ -0,0 +1,59 @@
+# benchmarks/bench_census.py
+# Per-pod concurrent census over the whole range: the bucketed event sweep in
+# census.census_counts vs a sort-based sweep (sort departures, searchsorted the
+# grid into the sorted arrival / departure times), at hourly and minute grids.
+#
+#   python benchmarks/bench_census.py                # 10M visits
+#   python benchmarks/bench_census.py --n 1000000
+import argparse
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from census import NS_PER_MIN, census_counts  # noqa: E402
+from generate_data import generate_ed_data  # noqa: E402
+from timing import best_ms  # noqa: E402
+
+
+def sorted_sweep(arrivals, stay_min, groups, n_groups, start, n_steps, step_min) -> np.ndarray:
+    arr = arrivals.astype(np.int64)
+    dep = arr + stay_min.astype(np.int64) * NS_PER_MIN
+    grid = start.astype("datetime64[ns]").astype(np.int64) + np.arange(n_steps) * step_min * NS_PER_MIN
+    out = np.empty((n_groups, n_steps), dtype=np.int64)
+    for g in range(n_groups):
+        mine = groups == g
+        a, d = np.sort(arr[mine]), np.sort(dep[mine])
+        out[g] = np.searchsorted(a, grid, side="right") - np.searchsorted(d, grid, side="right")
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=10_000_000)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    df = generate_ed_data(n=args.n, out_csv=None)
+    arrivals = df["arrival_datetime"].to_numpy()
+    stay = df["length_of_stay_min"].to_numpy()
+    pod = df["pod"].cat.codes.to_numpy()
+    n_pods = len(df["pod"].cat.categories)
+    start = df["arrival_date"].iloc[0].to_datetime64()
+    span_min = int((df["arrival_date"].iloc[-1] - df["arrival_date"].iloc[0]).total_seconds() // 60) + 1440
+
+    print(f"{args.n:,} visits")
+    print(f"{'grid':>8} {'points':>10} {'sorted ms':>10} {'sweep ms':>10} {'speedup':>8}")
+    for step_min in [60, 1]:
+        n_steps = span_min // step_min
+        call = (arrivals, stay, pod, n_pods, start, n_steps, step_min)
+        assert np.array_equal(census_counts(*call), sorted_sweep(*call))
+        slow = best_ms(lambda: sorted_sweep(*call), args.repeat)
+        fast = best_ms(lambda: census_counts(*call), args.repeat)
+        label = "hourly" if step_min == 60 else "minute"
+        print(f"{label:>8} {n_pods * n_steps:>10,} {slow:>10.1f} {fast:>10.1f} {slow / fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
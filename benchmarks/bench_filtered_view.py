@@ -0,0 +1,68 @@
+# benchmarks/bench_filtered_view.py
+# Rerun cost of the filter + KPI/chart column reads: full `.copy()` of the
+# filtered frame vs FilteredView's lazy per-column gathers. Peak memory is the
+# tracemalloc high-water mark above the loaded frame (NumPy buffers are traced).
+#
+#   python benchmarks/bench_filtered_view.py               # 5M rows
+#   python benchmarks/bench_filtered_view.py --n 1000000
+import argparse
+import datetime as dt
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from filters import FilteredView, build_bitmap_index, build_day_index, select_rows  # noqa: E402
+from generate_data import generate_ed_data  # noqa: E402
+
+SELECTIONS = {
+    "triage_level": [1, 2, 3],
+    "chief_complaint": ["Chest Pain", "Abdominal Pain", "Injury", "Fever/Resp", "Headache", "Other"],
+    "arrival_mode": ["Ambulance", "Walk-in"],
+    "pod": ["Pod A", "Pod B"],
+}
+
+
+# the columns app.py's KPI, trend, bar, histogram and insight sections read
+MEASURES = ["door_to_provider_min", "length_of_stay_min", "bed_occupancy_pct", "flu_wave_flag"]
+KEYS = ["disposition", "arrival_date", "chief_complaint"]
+
+
+def consume(dff) -> None:
+    for col in MEASURES:
+        dff[col].mean()
+    for col in KEYS:
+        dff[col].value_counts()
+
+
+def run(mode: str, df, day_index, bitmap_index, reruns: int) -> None:
+    start, end = dt.date(2025, 10, 1), dt.date(2025, 12, 31)
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    for _ in range(reruns):
+        rows = select_rows(day_index, bitmap_index, start, end, SELECTIONS)
+        dff = df.iloc[rows].copy() if mode == "copy" else FilteredView(df, rows)
+        consume(dff)
+        del dff
+    ms = (time.perf_counter() - t0) / reruns * 1e3
+    peak_mb = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    print(f"{mode:>5}  rerun {ms:8.1f} ms   peak {peak_mb:8.1f} MB")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=5_000_000)
+    ap.add_argument("--reruns", type=int, default=5)
+    args = ap.parse_args()
+
+    df = generate_ed_data(n=args.n, out_csv=None)
+    day_index, bitmap_index = build_day_index(df), build_bitmap_index(df)
+    print(f"{args.n:,} visits, frame {df.memory_usage(deep=True).sum() / 2**20:,.0f} MB")
+    for mode in ["copy", "view"]:
+        run(mode, df, day_index, bitmap_index, args.reruns)
+
+
+if __name__ == "__main__":
+    main()
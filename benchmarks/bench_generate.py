@@ -0,0 +1,71 @@
+# benchmarks/bench_generate.py
+# Rows/sec for chief-complaint sampling: per-row rng.choice loop vs batched inverse-CDF.
+# Above --max-legacy-n the per-row loop is timed on a subsample of that many rows
+# and its rate reported for the full n (marked *): the loop's cost is linear in
+# rows, so rows/s does not depend on n. --max-legacy-n 0 skips it.
+#
+#   python benchmarks/bench_generate.py                 # n = 5k, 1M, 10M
+#   python benchmarks/bench_generate.py --sizes 5000 1000000 --max-legacy-n 1000000
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from generate_data import choice_by_group, generate_ed_data  # noqa: E402
+
+COMPLAINTS = np.array(["Chest Pain", "Abdominal Pain", "Injury", "Fever/Resp", "Headache", "Other"])
+P_BASE = np.array([0.10, 0.18, 0.22, 0.16, 0.08, 0.26])
+P_FLU = np.array([0.09, 0.16, 0.16, 0.28, 0.07, 0.24])
+
+
+def legacy_sampler(rng: np.random.Generator, flu_wave: np.ndarray) -> np.ndarray:
+    complaint = []
+    for i in range(len(flu_wave)):
+        probs = P_FLU if flu_wave[i] == 1 else P_BASE
+        complaint.append(rng.choice(COMPLAINTS, p=probs))
+    return np.array(complaint)
+
+
+def batched_sampler(rng: np.random.Generator, flu_wave: np.ndarray) -> np.ndarray:
+    return choice_by_group(rng, COMPLAINTS, np.vstack([P_BASE, P_FLU]), flu_wave)
+
+
+def rows_per_sec(fn, n: int) -> float:
+    rng = np.random.default_rng(0)
+    flu_wave = (rng.random(n) < 0.23).astype(int)
+    t0 = time.perf_counter()
+    fn(rng, flu_wave)
+    return n / (time.perf_counter() - t0)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[5_000, 1_000_000, 10_000_000])
+    ap.add_argument("--max-legacy-n", type=int, default=1_000_000,
+                    help="time the per-row loop on at most this many rows (it takes minutes at 10M); "
+                         "0 skips it")
+    args = ap.parse_args()
+
+    print(f"{'n':>12} {'legacy rows/s':>15} {'batched rows/s':>15} {'speedup':>9} {'generate rows/s':>16}")
+    subsampled = False
+    for n in args.sizes:
+        batched = rows_per_sec(batched_sampler, n)
+        t0 = time.perf_counter()
+        generate_ed_data(n=n, out_csv=None)
+        full = n / (time.perf_counter() - t0)
+        if args.max_legacy_n <= 0:
+            print(f"{n:>12,} {'skipped':>15} {batched:>15,.0f} {'skipped':>9} {full:>16,.0f}")
+            continue
+        legacy = rows_per_sec(legacy_sampler, min(n, args.max_legacy_n))
+        mark = "*" if n > args.max_legacy_n else " "
+        subsampled = subsampled or n > args.max_legacy_n
+        print(f"{n:>12,} {legacy:>14,.0f}{mark} {batched:>15,.0f} {batched / legacy:>7.0f}x{mark} {full:>16,.0f}")
+    if subsampled:
+        print(f"* per-row loop timed on {args.max_legacy_n:,} rows; its rows/s is flat in n")
+
+
+if __name__ == "__main__":
+    main()
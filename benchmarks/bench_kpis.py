@@ -0,0 +1,55 @@
+# benchmarks/bench_kpis.py
+# KPI block: the original six separate scans (len, three safe_means, two
+# disposition.eq().mean()) vs the fused kpi_totals kernel, at 1M and 10M
+# filtered rows.
+#
+#   python benchmarks/bench_kpis.py
+#   python benchmarks/bench_kpis.py --sizes 1000000
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from filters import FilteredView  # noqa: E402
+from generate_data import generate_ed_data  # noqa: E402
+from metrics import kpi_totals  # noqa: E402
+from timing import best_ms  # noqa: E402
+
+
+def safe_mean(series: pd.Series) -> float:
+    return float(series.mean()) if len(series) else float("nan")
+
+
+def legacy_kpis(dff) -> dict[str, float]:
+    total_visits = len(dff)
+    return {
+        "avg_dtp": safe_mean(dff["door_to_provider_min"]),
+        "avg_los": safe_mean(dff["length_of_stay_min"]),
+        "avg_occ": safe_mean(dff["bed_occupancy_pct"]),
+        "lwbs_rate": (dff["disposition"].eq("Left Without Being Seen").mean() * 100) if total_visits else 0.0,
+        "admit_rate": (dff["disposition"].eq("Admitted").mean() * 100) if total_visits else 0.0,
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1_000_000, 10_000_000])
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    print(f"{'filtered rows':>14} {'legacy ms':>10} {'fused ms':>10} {'speedup':>8}")
+    for n in args.sizes:
+        df = generate_ed_data(n=n, out_csv=None)
+        # a fresh view each time so the column gathers are part of both costs
+        legacy = best_ms(lambda: legacy_kpis(FilteredView(df, slice(0, n))), args.repeat)
+        fused = best_ms(lambda: kpi_totals(FilteredView(df, slice(0, n))), args.repeat)
+        k, ref = kpi_totals(FilteredView(df, slice(0, n))), legacy_kpis(df)
+        assert np.isclose(k.avg_los, ref["avg_los"]) and np.isclose(k.lwbs_rate, ref["lwbs_rate"])
+        print(f"{n:>14,} {legacy:>10.1f} {fused:>10.1f} {legacy / fused:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+# benchmarks/bench_memory.py
+# Per-column memory of the visits frame: the original load path (read_csv +
+# Python date objects) vs the declared schema in schema.py.
+#
+#   python benchmarks/bench_memory.py                    # generates 1M visits
+#   python benchmarks/bench_memory.py --path ed_visits.csv
+import argparse
+import os
+import sys
+import tempfile
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from generate_data import generate_ed_data  # noqa: E402
+from schema import memory_report  # noqa: E402
+from storage import read_visits  # noqa: E402
+
+
+def legacy_load(path: str) -> pd.DataFrame:
+    df = pd.read_csv(path, parse_dates=["arrival_datetime"])
+    df["arrival_date"] = pd.to_datetime(df["arrival_datetime"]).dt.date
+    return df
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--path", help="existing CSV extract (default: generate one)")
+    ap.add_argument("--n", type=int, default=1_000_000)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.path
+        if path is None:
+            path = os.path.join(tmp, "ed_visits.csv")
+            generate_ed_data(n=args.n, out_csv=path)
+        report = memory_report(legacy_load(path), read_visits(path))
+    print(report.to_string())
+
+
+if __name__ == "__main__":
+    main()
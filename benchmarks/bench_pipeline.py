@@ -0,0 +1,144 @@
+# benchmarks/bench_pipeline.py
+# End-to-end timings of one dashboard rerun's pieces, outside Streamlit: load
+# (CSV / Parquet, plus building the store's indexes), each filter combination,
+# the KPI block, every chart's aggregation and figure build, and the insights.
+# Each step reports its best wall time and its tracemalloc peak (a separate,
+# traced run, so tracing does not skew the timing). --json appends one record
+# per step for regression tracking across commits. Like the other benchmarks
+# this is a plain argparse script, not a pytest-benchmark / asv suite; timing
+# helpers are shared through benchmarks/timing.py.
+#
+#   python benchmarks/bench_pipeline.py                       # 5k, 100k, 1M, 10M visits
+#   python benchmarks/bench_pipeline.py --sizes 5000 100000 --json bench.jsonl
+import argparse
+import datetime as dt
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from cube import cube_cells  # noqa: E402
+from filters import FilteredView, select_rows  # noqa: E402
+from generate_data import generate_ed_data  # noqa: E402
+from ingest import VisitStore  # noqa: E402
+from metrics import (  # noqa: E402
+    complaint_summary, daily_trend, dow_hour_wait, kpi_totals, occupancy_sweep, split_means,
+)
+from plots import binned_counts, density_grid, figure_bytes, stratified_sample  # noqa: E402
+from sections import (  # noqa: E402
+    bar_figure, bar_frame, census_figure, census_frame, filter_result, heat_figure, hist_figure, insight_lines,
+    scatter_density_figure, scatter_points_figure, sweep_figure, trend_figure,
+)
+from sketch import sketch_counts, sketch_quantiles  # noqa: E402
+from storage import read_visits, write_visits  # noqa: E402
+from timing import measure  # noqa: E402
+
+ALL = {
+    "triage_level": [1, 2, 3, 4, 5],
+    "chief_complaint": ["Chest Pain", "Abdominal Pain", "Injury", "Fever/Resp", "Headache", "Other"],
+    "arrival_mode": ["Ambulance", "Walk-in"],
+    "pod": ["Pod A", "Pod B", "Pod C"],
+}
+FILTERS = {
+    "everything": (dt.date(2025, 10, 1), dt.date(2025, 12, 31), ALL),
+    "one month": (dt.date(2025, 11, 1), dt.date(2025, 11, 30), ALL),
+    "acute, pods A/B": (
+        dt.date(2025, 10, 1), dt.date(2025, 12, 31), {**ALL, "triage_level": [1, 2], "pod": ["Pod A", "Pod B"]},
+    ),
+    "walk-in injuries": (
+        dt.date(2025, 10, 1),
+        dt.date(2025, 12, 31),
+        {**ALL, "chief_complaint": ["Injury"], "arrival_mode": ["Walk-in"]},
+    ),
+}
+
+
+def git_rev() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def steps(snapshot, csv_path: str, parquet_path: str) -> dict:
+    # step name -> zero-argument callable; chart steps use the "everything" filter
+    start, end, selections = FILTERS["everything"]
+    result = filter_result(snapshot, start, end, selections)
+    dff = FilteredView(snapshot.df, result.rows)
+    cells = cube_cells(snapshot.cube, start, end, selections)
+    census = census_frame(snapshot, start, end, selections, 60)
+    bar_df = bar_frame(result.by_complaint, "length_of_stay_min")
+
+    out = {
+        "load csv": lambda: read_visits(csv_path),
+        "load parquet": lambda: read_visits(parquet_path),
+        "build store (parquet)": lambda: VisitStore(parquet_path),
+    }
+    for label, (s, e, sel) in FILTERS.items():
+        out[f"filter rows: {label}"] = (
+            lambda s=s, e=e, sel=sel: select_rows(snapshot.day_index, snapshot.bitmap_index, s, e, sel)
+        )
+        out[f"filter result: {label}"] = lambda s=s, e=e, sel=sel: filter_result(snapshot, s, e, sel)
+    out.update({
+        "kpis": lambda: kpi_totals(FilteredView(snapshot.df, result.rows)),
+        "percentiles (sketch)": lambda: sketch_quantiles(sketch_counts(snapshot.sketches, start, end, selections)),
+        "agg: trend": lambda: daily_trend(cells),
+        "agg: bar": lambda: complaint_summary(cells),
+        "agg: heatmap": lambda: dow_hour_wait(cells),
+        "agg: scatter sample": lambda: stratified_sample(FilteredView(snapshot.df, result.rows), 2500),
+        "agg: scatter density": lambda: density_grid(dff["bed_occupancy_pct"], dff["door_to_provider_min"]),
+        "agg: histogram": lambda: binned_counts(dff["length_of_stay_min"], bins=40),
+        "agg: census (hourly)": lambda: census_frame(snapshot, start, end, selections, 60),
+        "agg: insight splits": lambda: split_means(dff),
+        "agg: occupancy sweep": lambda: occupancy_sweep(dff),
+        "fig: trend": lambda: figure_bytes(trend_figure(result.trend, "door_to_provider_min")),
+        "fig: bar": lambda: figure_bytes(bar_figure(bar_df, "length_of_stay_min")),
+        "fig: scatter points": lambda: figure_bytes(scatter_points_figure(dff, 2500)),
+        "fig: scatter density": lambda: figure_bytes(scatter_density_figure(dff)),
+        "fig: histogram": lambda: figure_bytes(hist_figure(dff)),
+        "fig: heatmap": lambda: figure_bytes(heat_figure(result.heat)),
+        "fig: census": lambda: figure_bytes(census_figure(census)),
+        "fig: occupancy sweep": lambda: figure_bytes(sweep_figure(result.sweep, 85)),
+        "insights": lambda: insight_lines(result, 85),
+    })
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[5_000, 100_000, 1_000_000, 10_000_000])
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--json", help="append one JSON record per step to this file")
+    args = ap.parse_args()
+
+    rev, stamp = git_rev(), dt.datetime.now().isoformat(timespec="seconds")
+    records = []
+    for n in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            csv_path, parquet_path = os.path.join(tmp, "ed_visits.csv"), os.path.join(tmp, "ed_visits.parquet")
+            df = generate_ed_data(n=n, out_csv=None)
+            write_visits(df, csv_path)
+            write_visits(df, parquet_path)
+            del df
+            snapshot = VisitStore(parquet_path).snapshot()
+
+            print(f"\n{n:,} visits")
+            print(f"{'step':>32} {'ms':>10} {'peak MB':>9}")
+            for step, fn in steps(snapshot, csv_path, parquet_path).items():
+                ms, peak = measure(fn, args.repeat)
+                print(f"{step:>32} {ms:>10.1f} {peak:>9.1f}")
+                records.append({"rev": rev, "date": stamp, "rows": n, "step": step, "ms": ms, "peak_mb": peak})
+
+    if args.json:
+        with open(args.json, "a") as f:
+            for rec in records:
+                f.write(json.dumps(rec) + "\n")
+
+
+if __name__ == "__main__":
+    main()
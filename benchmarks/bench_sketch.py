@@ -0,0 +1,65 @@
+# benchmarks/bench_sketch.py
+# p50/p90/p95 of door-to-provider and LOS for a filter: exact np.quantile over
+# the filtered visits vs rolling up the merged sketches (sketch.py), plus the
+# observed relative error against the exact order statistic and the bound.
+#
+#   python benchmarks/bench_sketch.py                 # 1M and 10M visits
+#   python benchmarks/bench_sketch.py --sizes 1000000
+import argparse
+import datetime as dt
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from filters import FilteredView, build_bitmap_index, build_day_index, select_rows  # noqa: E402
+from generate_data import generate_ed_data  # noqa: E402
+from sketch import (  # noqa: E402
+    QUANTILES, SKETCH_ALPHA, SKETCH_METRICS, build_sketches, sketch_counts, sketch_quantiles,
+)
+from timing import best_ms  # noqa: E402
+
+FILTERS = {
+    "all rows": {},
+    "triage 1-3, pods A/B": {"triage_level": [1, 2, 3], "pod": ["Pod A", "Pod B"]},
+    "walk-in injuries": {"chief_complaint": ["Injury"], "arrival_mode": ["Walk-in"]},
+}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1_000_000, 10_000_000])
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    start, end = dt.date(2025, 10, 1), dt.date(2025, 12, 31)
+    print(f"error bound: {SKETCH_ALPHA:.0%} relative")
+    for n in args.sizes:
+        df = generate_ed_data(n=n, out_csv=None)
+        day_index, bitmap_index = build_day_index(df), build_bitmap_index(df)
+        t0 = time.perf_counter()
+        table = build_sketches(df)
+        build_s = time.perf_counter() - t0
+        mb = table.entries.memory_usage(deep=True).sum() / 2**20
+        print(f"\n{n:,} visits: sketches built in {build_s:.2f} s, {len(table.entries):,} entries, {mb:,.1f} MB")
+        print(f"{'filter':>22} {'rows':>11} {'exact ms':>9} {'sketch ms':>10} {'speedup':>8} {'max rel err':>12}")
+        for label, selections in FILTERS.items():
+            def exact():
+                view = FilteredView(df, select_rows(day_index, bitmap_index, start, end, selections))
+                return {m: np.quantile(view[m].to_numpy(), QUANTILES, method="lower") for m in SKETCH_METRICS}
+
+            def rolled_up():
+                return sketch_quantiles(sketch_counts(table, start, end, selections))
+
+            ref, est = exact(), rolled_up()
+            err = max(np.max(np.abs(est.loc[m].to_numpy() - ref[m]) / ref[m]) for m in SKETCH_METRICS)
+            assert err <= SKETCH_ALPHA + 1e-9
+            rows = int(sketch_counts(table, start, end, selections)[0].sum())
+            slow, fast = best_ms(exact, args.repeat), best_ms(rolled_up, args.repeat)
+            print(f"{label:>22} {rows:>11,} {slow:>9.1f} {fast:>10.1f} {slow / fast:>7.1f}x {err:>11.2%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+# benchmarks/timing.py
+# Timing helpers shared by the benchmark scripts. The benchmarks are plain
+# argparse scripts run with python, not pytest-benchmark or asv suites: the
+# repo has no test runner, and the scripts import this module from their own
+# directory.
+import time
+import tracemalloc
+
+
+def best_ms(fn, repeat: int) -> float:
+    # Best wall time of repeat calls, in ms
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times) * 1e3
+
+
+def measure(fn, repeat: int) -> tuple[float, float]:
+    # (best ms over repeat runs, tracemalloc peak MB of one more run); the traced
+    # run is separate so tracing does not skew the timing
+    ms = best_ms(fn, repeat)
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    return ms, peak
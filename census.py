@@ -0,0 +1,81 @@
+# census.py
+import datetime as dt
+
+import numpy as np
+import pandas as pd
+
+from filters import FilteredView
+
+NS_PER_MIN = 60 * 10**9
+
+def census_counts(
+    arrivals: np.ndarray,
+    stay_min: np.ndarray,
+    groups: np.ndarray,
+    n_groups: int,
+    start: np.datetime64,
+    n_steps: int,
+    step_min: int,
+) -> np.ndarray:
+    # Patients in the department at each grid time t_k = start + k * step, per
+    # group: #(arrival <= t_k) - #(departure <= t_k). Each arrival is a +1 event
+    # and each departure (arrival + LOS) a -1 event; events are bucketed to the
+    # first grid time at or after them (a counting sort, so O(n + groups * steps)
+    # instead of sorting the departures) and a cumulative sum sweeps the grid.
+    # Events before start land in bucket 0, events after the grid in an overflow
+    # bucket that is dropped. Returns an (n_groups, n_steps) int64 array.
+    step = step_min * NS_PER_MIN
+    t0 = start.astype("datetime64[ns]").astype(np.int64)
+    arr = arrivals.astype("datetime64[ns]").astype(np.int64)
+    dep = arr + stay_min.astype(np.int64) * NS_PER_MIN
+    base = groups.astype(np.int64) * (n_steps + 1)
+    size = n_groups * (n_steps + 1)
+
+    def buckets(t: np.ndarray) -> np.ndarray:
+        # ceil((t - start) / step), clipped to [0, n_steps]
+        return base + np.clip(-((t0 - t) // step), 0, n_steps)
+
+    deltas = np.bincount(buckets(arr), minlength=size) - np.bincount(buckets(dep), minlength=size)
+    return np.cumsum(deltas.reshape(n_groups, n_steps + 1)[:, :n_steps], axis=1)
+
+def census_window(start: dt.date, end: dt.date, max_stay_min: int) -> tuple[dt.date, dt.date]:
+    # Arrival days whose visits can still be in the department during [start, end]
+    return start - dt.timedelta(days=-(-max_stay_min // 1440)), end
+
+def pod_census(
+    visits: FilteredView,
+    start: dt.date,
+    end: dt.date,
+    step_min: int = 60,
+    pods: list | None = None,
+) -> pd.DataFrame:
+    # Long-form census per pod (plus "All pods") on a step_min grid over the
+    # inclusive day range [start, end]. visits must include the arrivals of
+    # census_window(), not just those inside the range. Only pods in `pods`
+    # (the selection) or among the visits get a line, so deselected pods are
+    # not drawn as flat zeros.
+    t0 = pd.Timestamp(start).to_datetime64()
+    n_steps = int((pd.Timestamp(end) + pd.Timedelta(days=1) - pd.Timestamp(start)) / pd.Timedelta(minutes=step_min))
+    pod = visits["pod"]
+    codes = pod.cat.codes.to_numpy()
+    counts = census_counts(
+        visits["arrival_datetime"].to_numpy(),
+        visits["length_of_stay_min"].to_numpy(),
+        codes,
+        len(pod.cat.categories),
+        t0,
+        n_steps,
+        step_min,
+    )
+    times = pd.date_range(pd.Timestamp(start), periods=n_steps, freq=pd.Timedelta(minutes=step_min))
+    shown = np.zeros(len(pod.cat.categories), dtype=bool)
+    shown[codes[codes >= 0]] = True
+    if pods is not None:
+        shown |= pod.cat.categories.isin(pods)
+    labels = [*pod.cat.categories[shown], "All pods"]
+    counts = np.vstack([counts[shown], counts.sum(axis=0)])
+    return pd.DataFrame({
+        "time": np.tile(times, len(labels)),
+        "pod": np.repeat(labels, n_steps),
+        "census": counts.ravel(),
+    })
@@ -0,0 +1,99 @@
+# cube.py
+import datetime as dt
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from filters import (
+    BitmapIndex, DayIndex, FilteredView, build_bitmap_index, build_day_index, fold_day_tail, select_rows,
+)
+from schema import METRICS, SCHEMA
+
+# Cell grain of the pre-aggregated cube. arrival_date leads so cells come out
+# day-sorted and the same day / bitmap indexes used for visits work on cells.
+# It is the finest grain a chart or filter needs: the trend needs the day, the
+# heatmap the hour, the bar the complaint, and the sidebar filters the other
+# dimensions. disposition is not kept because no cube consumer reads it.
+# Cells are bounded by days x 24 x 180 (about 389k for the 90-day fixture),
+# not by visits. Measured: 237k cells at 1M visits, 351k at 5M and 375k at 10M.
+# That is a few hundred thousand cells, not tens of thousands, because each
+# cell sums about 14-27 visits at those sizes; reaching tens of thousands would
+# mean dropping the hour from the heatmap or the day from the trend.
+GRAIN = ["arrival_date", "hour", "triage_level", "chief_complaint", "arrival_mode", "pod"]
+
+class Cube(NamedTuple):
+    # cells: one row per observed GRAIN combination with "visits" and, for each
+    # metric m, "m_sum" and "m_sumsq"; plus the indexes for filtering cells.
+    cells: pd.DataFrame
+    day_index: DayIndex
+    bitmap_index: BitmapIndex
+
+def _grain_codes(df: pd.DataFrame) -> tuple[list[np.ndarray], list[int], pd.Index]:
+    day_codes, days = pd.factorize(df["arrival_date"], sort=True)
+    codes, sizes = [day_codes.astype(np.int64)], [len(days)]
+    for col in GRAIN[1:]:
+        if col == "hour":
+            codes.append(df[col].to_numpy().astype(np.int64))
+            sizes.append(24)
+        else:
+            codes.append(df[col].cat.codes.to_numpy().astype(np.int64))
+            sizes.append(len(df[col].cat.categories))
+    return codes, sizes, days
+
+def build_cube(df: pd.DataFrame) -> Cube:
+    # Mixed-radix key over the grain codes, one sort to find the distinct cells,
+    # then bincount for counts, sums and sums of squares.
+    codes, sizes, days = _grain_codes(df)
+    key = codes[0]
+    for c, size in zip(codes[1:], sizes[1:]):
+        key = key * size + c
+    cell_keys, cell_of_row = np.unique(key, return_inverse=True)
+
+    cells = {}
+    rem = cell_keys
+    for col, size in zip(reversed(GRAIN[1:]), reversed(sizes[1:])):
+        rem, code = np.divmod(rem, size)
+        if col == "hour":
+            cells[col] = code.astype(SCHEMA["hour"])
+        else:
+            cells[col] = pd.Categorical.from_codes(code, dtype=SCHEMA[col])
+    cells["arrival_date"] = days[rem]
+
+    out = pd.DataFrame({col: cells[col] for col in GRAIN})
+    out["dow"] = out["arrival_date"].dt.dayofweek.astype("int8")
+    out["visits"] = np.bincount(cell_of_row, minlength=len(cell_keys))
+    for m in METRICS:
+        values = df[m].to_numpy().astype(np.float64)
+        out[f"{m}_sum"] = np.bincount(cell_of_row, weights=values, minlength=len(cell_keys))
+        out[f"{m}_sumsq"] = np.bincount(cell_of_row, weights=values * values, minlength=len(cell_keys))
+    return Cube(cells=out, day_index=build_day_index(out), bitmap_index=build_bitmap_index(out))
+
+def merge_cells(cube: Cube, new_cells: pd.DataFrame) -> Cube:
+    # Fold newly built cells (of visits appended in time order) into the cube.
+    # Only the cells from the first new day on are re-grouped, so the cost
+    # tracks the appended days, not the cube size or the visit history.
+    value_cols = ["visits", *(f"{m}_{s}" for m in METRICS for s in ("sum", "sumsq"))]
+    cells, day_index, bitmap_index = fold_day_tail(
+        cube.cells, cube.day_index, cube.bitmap_index, new_cells, [*GRAIN, "dow"], value_cols,
+    )
+    return Cube(cells=cells, day_index=day_index, bitmap_index=bitmap_index)
+
+def cube_cells(cube: Cube, start: dt.date, end: dt.date, selections: dict[str, list]) -> FilteredView:
+    # Same filter semantics as the visit-level select_rows, applied to cells
+    return FilteredView(cube.cells, select_rows(cube.day_index, cube.bitmap_index, start, end, selections))
+
+def rollup(cells: FilteredView, by: list[str]) -> pd.DataFrame:
+    # Re-aggregate filtered cells to a coarser grain: visits plus mean and
+    # sample std of every metric, from the additive counts / sums / sums of squares.
+    value_cols = ["visits", *(f"{m}_{s}" for m in METRICS for s in ("sum", "sumsq"))]
+    totals = cells.frame([*by, *value_cols]).groupby(by, observed=True, sort=True)[value_cols].sum()
+    n = totals["visits"].to_numpy(dtype=np.float64)
+    out = totals[["visits"]].copy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for m in METRICS:
+            mean = totals[f"{m}_sum"].to_numpy() / n
+            var = (totals[f"{m}_sumsq"].to_numpy() - n * mean * mean) / (n - 1)
+            out[f"mean_{m}"] = mean
+            out[f"std_{m}"] = np.sqrt(np.clip(var, 0, None))
+    return out.reset_index()
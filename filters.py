@@ -0,0 +1,286 @@
+# filters.py
+import datetime as dt
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+def sort_by_arrival(df: pd.DataFrame) -> pd.DataFrame:
+    # Time-sorted primary order: the generator already emits visits this way, so
+    # this is usually just the O(n) monotonicity check.
+    if df["arrival_datetime"].is_monotonic_increasing:
+        return df
+    return df.sort_values("arrival_datetime", kind="stable", ignore_index=True)
+
+class DayIndex(NamedTuple):
+    # Rows of day days[i] are offsets[i]:offsets[i + 1] in the time-sorted frame.
+    days: np.ndarray     # datetime64, one entry per distinct arrival day
+    offsets: np.ndarray  # len(days) + 1 row offsets
+
+def build_day_index(df: pd.DataFrame) -> DayIndex:
+    day = df["arrival_date"].values
+    if len(day) == 0:
+        return DayIndex(days=day, offsets=np.zeros(1, dtype=np.int64))
+    starts = np.flatnonzero(day[1:] != day[:-1]) + 1
+    offsets = np.concatenate([[0], starts, [len(day)]]).astype(np.int64)
+    return DayIndex(days=day[offsets[:-1]], offsets=offsets)
+
+def extend_day_index(index: DayIndex, new_rows: pd.DataFrame) -> DayIndex:
+    # Day index after appending time-sorted new_rows (all arriving no earlier
+    # than the current last day) to the frame; O(new rows + days).
+    n_old = int(index.offsets[-1])
+    if len(index.days) == 0:
+        return build_day_index(new_rows)
+    tail = build_day_index(new_rows)
+    days, starts = tail.days, tail.offsets[:-1] + n_old
+    if len(days) and days[0] == index.days[-1]:
+        # first appended day continues the current last day
+        days, starts = days[1:], starts[1:]
+    return DayIndex(
+        days=np.concatenate([index.days, days]),
+        offsets=np.concatenate([index.offsets[:-1], starts, [n_old + len(new_rows)]]).astype(np.int64),
+    )
+
+def date_range_bounds(index: DayIndex, start: dt.date, end: dt.date) -> tuple[int, int]:
+    # Row bounds [lo, hi) of the inclusive day range [start, end]: two binary
+    # searches over the distinct days, independent of the number of visits.
+    i = np.searchsorted(index.days, pd.Timestamp(start).to_datetime64(), side="left")
+    j = np.searchsorted(index.days, pd.Timestamp(end).to_datetime64(), side="right")
+    lo, hi = int(index.offsets[i]), int(index.offsets[j])
+    return lo, max(lo, hi)
+
+# Sidebar dimensions served by the bitmap index
+FILTER_COLUMNS = ["triage_level", "chief_complaint", "arrival_mode", "pod"]
+
+class BitmapIndex(NamedTuple):
+    n_rows: int
+    # column -> category value -> np.packbits(rows with that value), 1 bit per row
+    bitmaps: dict[str, dict[object, np.ndarray]]
+    # column -> np.packbits(rows with a value), only for columns with missing
+    # values; those rows are in no value bitmap and never match a selection
+    valid: dict[str, np.ndarray] = {}
+
+def build_bitmap_index(df: pd.DataFrame, columns: list[str] = FILTER_COLUMNS) -> BitmapIndex:
+    bitmaps, valid = {}, {}
+    for col in columns:
+        values = df[col].astype("category")
+        codes = values.cat.codes.values
+        bitmaps[col] = {
+            value: np.packbits(codes == code)
+            for code, value in enumerate(values.cat.categories)
+            if (codes == code).any()
+        }
+        if (codes == -1).any():
+            valid[col] = np.packbits(codes != -1)
+    return BitmapIndex(n_rows=len(df), bitmaps=bitmaps, valid=valid)
+
+def _append_bits(packed: np.ndarray, n_old: int, new_bits: np.ndarray) -> np.ndarray:
+    # Packed bitmap of n_old rows followed by new_bits; only the trailing
+    # partially filled byte is unpacked and repacked.
+    keep = n_old // 8
+    partial = np.unpackbits(packed[keep:keep + 1])[:n_old % 8] if n_old % 8 else np.zeros(0, dtype=np.uint8)
+    return np.concatenate([packed[:keep], np.packbits(np.concatenate([partial, new_bits.astype(np.uint8)]))])
+
+def extend_bitmap_index(index: BitmapIndex, new_rows: pd.DataFrame) -> BitmapIndex:
+    # Bitmap index after appending new_rows; values first seen in the new rows
+    # get a bitmap that is all zeros for the existing rows.
+    bitmaps, valid = {}, {}
+    for col, value_bits in index.bitmaps.items():
+        values = new_rows[col].to_numpy()
+        present = ~pd.isna(values)
+        merged = {}
+        for value in {*value_bits, *pd.unique(values[present])}:
+            old = value_bits.get(value, np.zeros((index.n_rows + 7) // 8, dtype=np.uint8))
+            merged[value] = _append_bits(old, index.n_rows, values == value)
+        bitmaps[col] = merged
+        if col in index.valid or not present.all():
+            old = index.valid.get(col, np.packbits(np.ones(index.n_rows, dtype=bool)))
+            valid[col] = _append_bits(old, index.n_rows, present)
+    return BitmapIndex(n_rows=index.n_rows + len(new_rows), bitmaps=bitmaps, valid=valid)
+
+def fold_day_tail(
+    frame: pd.DataFrame,
+    day_index: DayIndex,
+    bitmap_index: BitmapIndex,
+    new: pd.DataFrame,
+    by: list[str],
+    values: list[str],
+) -> tuple[pd.DataFrame, DayIndex, BitmapIndex]:
+    # Add the day-sorted aggregate rows `new` into `frame` (same columns, grouped
+    # by `by`, arrival_date first) when new starts no earlier than frame's last
+    # day. Rows of earlier days are kept as they are; only the days from the
+    # first new one are re-grouped, and both indexes are cut back to that point
+    # and extended over the re-grouped tail, so the work tracks the new rows.
+    if new.empty:
+        return frame, day_index, bitmap_index
+    i = int(np.searchsorted(day_index.days, new["arrival_date"].values[0], side="left"))
+    lo = int(day_index.offsets[i])
+    tail = (
+        pd.concat([frame.iloc[lo:], new], ignore_index=True)
+          .groupby(by, observed=True, sort=True)[values]
+          .sum()
+          .reset_index()
+    )
+    head_days = DayIndex(days=day_index.days[:i], offsets=day_index.offsets[:i + 1])
+    # bits past lo in the last kept byte are ignored by _append_bits
+    head_bits = BitmapIndex(
+        n_rows=lo,
+        bitmaps={col: {v: bits[:(lo + 7) // 8] for v, bits in vb.items()} for col, vb in bitmap_index.bitmaps.items()},
+        valid={col: bits[:(lo + 7) // 8] for col, bits in bitmap_index.valid.items()},
+    )
+    return (
+        pd.concat([frame.iloc[:lo], tail], ignore_index=True),
+        extend_day_index(head_days, tail),
+        extend_bitmap_index(head_bits, tail),
+    )
+
+def _dimension_bits(
+    value_bits: dict[object, np.ndarray],
+    selected: list,
+    b0: int,
+    b1: int,
+    valid: np.ndarray | None = None,
+) -> np.ndarray | None:
+    # Packed bytes b0:b1 of the rows matching any selected value, or None when
+    # every value is selected and no row is missing one (the dimension does not
+    # restrict anything). OR-ing whichever of the selected / unselected sets is
+    # smaller keeps the work at most half the values; the complement is masked
+    # with the valid bitmap so rows missing a value stay unselected, as with isin.
+    selected = set(selected)
+    chosen = [v for v in value_bits if v in selected]
+    rest = [v for v in value_bits if v not in selected]
+    if not rest:
+        return None if valid is None else valid[b0:b1].copy()
+    if len(chosen) <= len(rest):
+        bits = np.zeros(b1 - b0, dtype=np.uint8)
+        for v in chosen:
+            bits |= value_bits[v][b0:b1]
+        return bits
+    bits = np.zeros(b1 - b0, dtype=np.uint8)
+    for v in rest:
+        bits |= value_bits[v][b0:b1]
+    bits = ~bits
+    if valid is not None:
+        bits &= valid[b0:b1]
+    return bits
+
+def category_mask(index: BitmapIndex, selections: dict[str, list], lo: int, hi: int) -> np.ndarray | None:
+    # Boolean mask over rows lo:hi for the combined selections (OR within a
+    # dimension, AND across them), or None when no dimension restricts rows.
+    # The bit algebra runs on the packed bytes covering the window only.
+    b0, b1 = lo // 8, (hi + 7) // 8
+    combined = None
+    for col, selected in selections.items():
+        bits = _dimension_bits(index.bitmaps[col], selected, b0, b1, index.valid.get(col))
+        if bits is None:
+            continue
+        combined = bits if combined is None else combined & bits
+    if combined is None:
+        return None
+    return np.unpackbits(combined)[lo - b0 * 8:hi - b0 * 8].view(bool)
+
+def select_rows(
+    day_index: DayIndex,
+    bitmap_index: BitmapIndex,
+    start: dt.date,
+    end: dt.date,
+    selections: dict[str, list],
+) -> slice | np.ndarray:
+    # Positions of the matching rows: a plain slice when only the date range
+    # applies, otherwise the window offset plus the set bits of the category mask.
+    lo, hi = date_range_bounds(day_index, start, end)
+    mask = category_mask(bitmap_index, selections, lo, hi)
+    if mask is None:
+        return slice(lo, hi)
+    return lo + np.flatnonzero(mask)
+
+class PackedRows(NamedTuple):
+    # Row positions lo + flatnonzero(mask) kept as the packed mask of the window
+    # [lo, lo + count): count / 8 bytes instead of 8 bytes per selected row, for
+    # results that are held on to (the shared filter cache).
+    lo: int
+    count: int
+    bits: np.ndarray
+
+def pack_rows(rows: slice | np.ndarray) -> slice | PackedRows:
+    if isinstance(rows, slice):
+        return rows
+    if len(rows) == 0:
+        return slice(0, 0)
+    lo, count = int(rows[0]), int(rows[-1]) - int(rows[0]) + 1
+    mask = np.zeros(count, dtype=bool)
+    mask[rows - lo] = True
+    return PackedRows(lo, count, np.packbits(mask))
+
+def unpack_rows(rows: slice | np.ndarray | PackedRows) -> slice | np.ndarray:
+    if not isinstance(rows, PackedRows):
+        return rows
+    return rows.lo + np.flatnonzero(np.unpackbits(rows.bits, count=rows.count))
+
+class FilteredView:
+    # Filtered rows of a shared frame without materializing them: holds the row
+    # positions from select_rows and gathers a column only when it is first read.
+    def __init__(self, df: pd.DataFrame, rows: slice | np.ndarray | PackedRows):
+        self._df = df
+        self.rows = rows = unpack_rows(rows)
+        self._gathered: dict[str, pd.Series] = {}
+        self._len = len(range(len(df))[rows]) if isinstance(rows, slice) else len(rows)
+
+    def __len__(self) -> int:
+        return self._len
+
+    @property
+    def columns(self) -> pd.Index:
+        return self._df.columns
+
+    def __getitem__(self, col: str) -> pd.Series:
+        if col not in self._gathered:
+            # a slice of the backing array is a view; a position array is one gather.
+            # copy=False keeps the view a view; callers treat columns as read-only.
+            self._gathered[col] = pd.Series(self._df[col].array[self.rows], name=col, copy=False)
+        return self._gathered[col]
+
+    def frame(self, columns: list[str]) -> pd.DataFrame:
+        # Just the columns a consumer needs, as a regular DataFrame
+        return pd.DataFrame({col: self[col] for col in columns})
+
+    def take(self, positions: np.ndarray, columns: list[str]) -> pd.DataFrame:
+        # Rows at positions (relative to the view) for the given columns only
+        if isinstance(self.rows, slice):
+            span = range(len(self._df))[self.rows]
+            picked = span.start + span.step * np.asarray(positions)
+        else:
+            picked = self.rows[positions]
+        return pd.DataFrame({col: self._df[col].array[picked] for col in columns})
+
+def filter_tail(
+    df: pd.DataFrame,
+    start_row: int,
+    start: dt.date,
+    end: dt.date | None,
+    selections: dict[str, list],
+) -> FilteredView:
+    # Rows appended at or after start_row that pass the filters (end=None is
+    # open-ended). A direct mask over the short tail; no index is needed.
+    tail = df.iloc[start_row:]
+    mask = (tail["arrival_date"] >= pd.Timestamp(start)).to_numpy()
+    if end is not None:
+        mask = mask & (tail["arrival_date"] <= pd.Timestamp(end)).to_numpy()
+    for col, selected in selections.items():
+        mask = mask & tail[col].isin(selected).to_numpy()
+    return FilteredView(df, start_row + np.flatnonzero(mask))
+
+def filter_key(
+    bitmap_index: BitmapIndex,
+    start: dt.date,
+    end: dt.date,
+    selections: dict[str, list],
+) -> tuple:
+    # Hashable, order-insensitive form of the sidebar state. A dimension with
+    # every value selected normalizes to None, the same as not filtering on it.
+    dims = []
+    for col in sorted(selections):
+        values = bitmap_index.bitmaps[col]
+        chosen = {v for v in values if v in set(selections[col])}
+        dims.append((col, None if len(chosen) == len(values) else tuple(sorted(chosen, key=str))))
+    return (pd.Timestamp(start).date(), pd.Timestamp(end).date(), tuple(dims))
@@ -1,35 +1,78 @@
 # generate_data.py
+import argparse
+import os
+import shutil
+import tempfile
+import warnings
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 import pandas as pd
 
+from schema import apply_schema
+from storage import SUFFIX, format_for_path, read_visits, write_chunks, write_visits
+
 def logistic(x: np.ndarray) -> np.ndarray:
     return 1 / (1 + np.exp(-x))
 
-def generate_ed_data(
-    n: int = 5000,
+def choice_by_group(
+    rng: np.random.Generator,
+    choices: np.ndarray,
+    probs: np.ndarray,
+    group: np.ndarray,
+) -> np.ndarray:
+    # Batched inverse-CDF sampling: row i draws from choices with probs[group[i]].
+    # One uniform per row, then a binary search against that row's CDF.
+    cdf = np.cumsum(probs, axis=1)
+    cdf[:, -1] = 1.0  # guard against float round-off in the last bucket
+    u = rng.random(len(group))
+    idx = np.empty(len(group), dtype=np.intp)
+    for g in range(len(probs)):
+        rows = group == g
+        idx[rows] = np.searchsorted(cdf[g], u[rows], side="right")
+    return choices[idx]
+
+def hour_peak_curve(hour: np.ndarray) -> np.ndarray:
+    # Busy hours: late afternoon/evening peak, low at night
+    return (
+        0.7 * np.exp(-((hour - 18) / 4.5) ** 2) +   # evening peak
+        0.4 * np.exp(-((hour - 10) / 4.0) ** 2) +   # late morning mini-peak
+        0.10
+    )
+
+# Normalizer for the occupancy signal; fixed so every chunk scales identically
+HOUR_PEAK_MAX = float(hour_peak_curve(np.arange(24)).max())
+
+DEFAULT_CHUNK_SIZE = 1_000_000
+
+def chunk_rng(seed: int, chunk_index: int) -> np.random.Generator:
+    # Same stream as np.random.SeedSequence(seed).spawn(k)[chunk_index] for any k > chunk_index,
+    # so chunk i's random draws do not depend on how many chunks (or workers) there are.
+    # Its rows still depend on n and chunk_size through chunk_window.
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(chunk_index,)))
+
+def generate_ed_block(
+    rng: np.random.Generator,
+    n: int,
     start_date: str = "2025-10-01",
     days: int = 90,
-    seed: int = 42,
-    out_csv: str = "ed_visits.csv",
+    first_visit_id: int = 1,
+    window: tuple[float, float] | None = None,
 ) -> pd.DataFrame:
-    rng = np.random.default_rng(seed)
-
     # --- Time base ---
     start = pd.Timestamp(start_date)
-    # random arrivals across a window
-    arrival = start + pd.to_timedelta(rng.uniform(0, days * 24 * 60, size=n), unit="m")
+    # random arrivals across a window (minutes from start), emitted in time order
+    lo, hi = window if window is not None else (0, days * 24 * 60)
+    minutes = np.sort(rng.uniform(lo, hi, size=n))
+    arrival = start + pd.to_timedelta(minutes, unit="m")
     arrival = arrival.floor("min")
 
     dow = arrival.dayofweek.values  # 0=Mon..6=Sun
     hour = arrival.hour.values
 
     # --- Seasonality: volume/crowding patterns ---
-    # Busy hours: late afternoon/evening peak, low at night
-    hour_peak = (
-        0.7 * np.exp(-((hour - 18) / 4.5) ** 2) +   # evening peak
-        0.4 * np.exp(-((hour - 10) / 4.0) ** 2) +   # late morning mini-peak
-        0.10
-    )
+    hour_peak = hour_peak_curve(hour)
     # Weekend slightly busier
     weekend = (dow >= 5).astype(int)
     dow_effect = 1.0 + 0.10 * weekend - 0.05 * (dow == 1)  # Tue slightly lighter
@@ -41,7 +84,7 @@ def generate_ed_data(
     # bed occupancy: correlated with busy hours + weekend + flu wave + noise
     bed_occ = (
         55
-        + 30 * (hour_peak / hour_peak.max())
+        + 30 * (hour_peak / HOUR_PEAK_MAX)
         + 6 * weekend
         + 10 * flu_wave
         + rng.normal(0, 6, size=n)
@@ -70,11 +113,7 @@ def generate_ed_data(
     # during flu wave, bump Fever/Resp + Other, reduce Injury a bit
     p_flu = np.array([0.09, 0.16, 0.16, 0.28, 0.07, 0.24])
 
-    complaint = []
-    for i in range(n):
-        probs = p_flu if flu_wave[i] == 1 else p_base
-        complaint.append(rng.choice(base_complaints, p=probs))
-    complaint = np.array(complaint)
+    complaint = choice_by_group(rng, base_complaints, np.vstack([p_base, p_flu]), flu_wave)
 
     # orders: depend on triage + complaint
     labs_prob = (
@@ -147,7 +186,7 @@ def generate_ed_data(
     disposition = np.where((disposition != "Left Without Being Seen") & (r2 < admit_prob), "Admitted", disposition)
 
     df = pd.DataFrame({
-        "visit_id": np.arange(1, n + 1),
+        "visit_id": np.arange(first_visit_id, first_visit_id + n),
         "arrival_datetime": arrival.astype("datetime64[ns]"),
         "day_of_week": arrival.day_name(),
         "hour": hour,
@@ -166,13 +205,149 @@ def generate_ed_data(
     })
 
     # A couple of convenient derived fields for dashboard
-    df["arrival_date"] = pd.to_datetime(df["arrival_datetime"]).dt.date
-    df["is_weekend"] = (pd.to_datetime(df["arrival_datetime"]).dt.dayofweek >= 5).astype(int)
+    df["arrival_date"] = df["arrival_datetime"].dt.normalize()
+    df["is_weekend"] = weekend
+
+    return apply_schema(df)
+
+def chunk_window(offset: int, size: int, n: int, days: int) -> tuple[float, float]:
+    # Chunk covering rows [offset, offset + size) of n draws its arrivals from the
+    # matching slice of the time window, so consecutive chunks are time-ordered
+    # and the whole stream comes out sorted by arrival_datetime. The slice is a
+    # share of n, so for a fixed seed the generated rows change with n (and
+    # chunk_size); the output is reproducible for a given (n, chunk_size, seed)
+    # and identical for any worker count, not a prefix of a larger run.
+    total = days * 24 * 60
+    if n == 0:
+        return 0.0, float(total)
+    return total * offset / n, total * (offset + size) / n
 
-    df.to_csv(out_csv, index=False)
+def generate_ed_chunks(
+    n: int = 5000,
+    start_date: str = "2025-10-01",
+    days: int = 90,
+    seed: int = 42,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[pd.DataFrame]:
+    # Yields consecutive visit_id ranges of at most chunk_size rows; chunk i is
+    # seeded from (seed, i), so peak memory is bounded by chunk_size, not n.
+    # n=0 yields one empty chunk, so callers still get the declared schema.
+    for i, offset in enumerate(range(0, max(n, 1), chunk_size)):
+        size = min(chunk_size, n - offset)
+        yield generate_ed_block(
+            chunk_rng(seed, i), size, start_date, days,
+            first_visit_id=offset + 1, window=chunk_window(offset, size, n, days),
+        )
+
+def _write_shard(task: tuple) -> str:
+    # Process-pool worker: build chunk i and write it to its own shard file.
+    i, offset, size, n, start_date, days, seed, path, fmt, header = task
+    chunk = generate_ed_block(
+        chunk_rng(seed, i), size, start_date, days,
+        first_visit_id=offset + 1, window=chunk_window(offset, size, n, days),
+    )
+    write_visits(chunk, path, fmt, header=header)
+    return path
+
+def merge_shards(paths: list[str], out_path: str, fmt: str) -> None:
+    if fmt == "csv":
+        # only the first shard carries a header, so plain byte concatenation works
+        with open(out_path, "wb") as out:
+            for path in paths:
+                with open(path, "rb") as shard:
+                    shutil.copyfileobj(shard, out)
+    else:
+        write_chunks((read_visits(path) for path in paths), out_path, fmt)
+
+def generate_ed_parallel(
+    n: int,
+    out_path: str,
+    start_date: str = "2025-10-01",
+    days: int = 90,
+    seed: int = 42,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    workers: int | None = None,
+    partitioned: bool = False,
+    fmt: str | None = None,
+) -> int:
+    # Shards are the same seeded chunks as generate_ed_chunks, so the output is
+    # bit-identical for any worker count. partitioned=True leaves one
+    # part-NNNNN shard per chunk in out_path; otherwise shards are merged in order.
+    # There is one task per chunk, so at most ceil(n / chunk_size) workers are busy.
+    fmt = fmt or ("csv" if partitioned else format_for_path(out_path))
+    if partitioned:
+        os.makedirs(out_path, exist_ok=True)
+        shard_dir = out_path
+    else:
+        shard_dir = tempfile.mkdtemp(prefix="ed_shards_", dir=os.path.dirname(os.path.abspath(out_path)))
+
+    tasks = [
+        (i, offset, min(chunk_size, n - offset), n, start_date, days, seed,
+         os.path.join(shard_dir, f"part-{i:05d}{SUFFIX[fmt]}"), fmt, partitioned or i == 0)
+        for i, offset in enumerate(range(0, max(n, 1), chunk_size))
+    ]
+    if workers is not None and workers > len(tasks):
+        warnings.warn(
+            f"{workers} workers but only {len(tasks)} chunk(s) of {chunk_size:,} rows; "
+            f"{workers - len(tasks)} worker(s) would be idle. A smaller chunk_size gives "
+            "more tasks but changes the generated rows.",
+            stacklevel=2,
+        )
+        workers = len(tasks)
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            paths = list(pool.map(_write_shard, tasks))
+        if not partitioned:
+            merge_shards(paths, out_path, fmt)
+    finally:
+        if not partitioned:
+            shutil.rmtree(shard_dir, ignore_errors=True)
+    return n
+
+def generate_ed_data(
+    n: int = 5000,
+    start_date: str = "2025-10-01",
+    days: int = 90,
+    seed: int = 42,
+    out_csv: str | None = "ed_visits.csv",
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> pd.DataFrame:
+    df = pd.concat(
+        generate_ed_chunks(n, start_date, days, seed, chunk_size),
+        ignore_index=True,
+    )
+    if out_csv:
+        # Despite the name, .parquet / .feather paths are written in that format
+        write_visits(df, out_csv)
     return df
 
+def main(argv: list[str] | None = None) -> None:
+    ap = argparse.ArgumentParser(description="Generate synthetic ED visits, streamed to disk chunk by chunk.")
+    ap.add_argument("--n", type=int, default=5000, help="number of visits")
+    ap.add_argument("--start-date", default="2025-10-01")
+    ap.add_argument("--days", type=int, default=90)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    ap.add_argument("--out", default="ed_visits.csv")
+    ap.add_argument("--format", choices=sorted(SUFFIX), default=None,
+                    help="output format (default: inferred from --out extension)")
+    ap.add_argument("--workers", type=int, default=1,
+                    help="process-pool size; output is identical for any value. Parallelism is "
+                         "limited to ceil(n / chunk-size) tasks, e.g. 10 at the default chunk size "
+                         "and n=10M")
+    ap.add_argument("--partitioned", action="store_true",
+                    help="write one file per chunk into the --out directory instead of merging")
+    args = ap.parse_args(argv)
+
+    if args.workers > 1 or args.partitioned:
+        rows = generate_ed_parallel(
+            args.n, args.out, args.start_date, args.days, args.seed,
+            args.chunk_size, args.workers, args.partitioned, args.format,
+        )
+    else:
+        chunks = generate_ed_chunks(args.n, args.start_date, args.days, args.seed, args.chunk_size)
+        rows = write_chunks(chunks, args.out, args.format)
+    print(f"Saved: {rows:,} visits to {args.out}")
+
 if __name__ == "__main__":
-    df = generate_ed_data()
-    print("Saved:", df.shape, "to ed_visits.csv")
-    print(df.head(3))
+    main()
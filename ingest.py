@@ -0,0 +1,120 @@
+# ingest.py
+import os
+import threading
+from typing import NamedTuple
+
+import pandas as pd
+
+from cube import Cube, build_cube, merge_cells
+from filters import (
+    BitmapIndex, DayIndex, build_bitmap_index, build_day_index, extend_bitmap_index, extend_day_index,
+    sort_by_arrival,
+)
+from sketch import SketchTable, build_sketches, merge_sketches
+from storage import detect_format, partition_files, read_csv_head, read_csv_tail, read_visits
+
+class Snapshot(NamedTuple):
+    # A consistent view of the store; version bumps whenever rows are added,
+    # epoch only when existing rows moved (reload or out-of-order re-sort), so
+    # within one epoch rows [0, n) of an older snapshot are unchanged.
+    df: pd.DataFrame
+    day_index: DayIndex
+    bitmap_index: BitmapIndex
+    cube: Cube
+    sketches: SketchTable
+    version: int
+    epoch: int
+
+class VisitStore:
+    # In-memory visits plus their derived indexes, kept current by appending
+    # only what was added to the source since the last refresh():
+    #   - CSV file: bytes after the last parsed offset
+    #   - directory of part-* shards: part files not seen before
+    #   - Parquet / Feather file: re-read on change, keeping visit_id above the
+    #     high-water mark (these formats cannot be tailed)
+    # Appended rows extend the day index, bitmap index, cube and quantile
+    # sketches incrementally; only out-of-order arrivals force a full re-sort
+    # and rebuild.
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._version = -1
+        self._epoch = -1
+        self._load_full()
+
+    def _load_full(self) -> None:
+        self.fmt = detect_format(self.path)
+        self._offset = 0
+        if self.fmt == "csv" and not os.path.isdir(self.path):
+            # _offset is the bytes actually parsed, so rows appended during the
+            # read (or a partial last line) are picked up by the next refresh()
+            df, self._offset = read_csv_head(self.path)
+        else:
+            df = read_visits(self.path)
+        df = sort_by_arrival(df)
+        self._columns = list(df.columns)
+        self._parts = set(partition_files(self.path)) if os.path.isdir(self.path) else set()
+        self._mtime = os.path.getmtime(self.path)
+        self._version += 1
+        self._epoch += 1
+        self._snapshot = Snapshot(
+            df, build_day_index(df), build_bitmap_index(df), build_cube(df), build_sketches(df),
+            self._version, self._epoch,
+        )
+
+    def snapshot(self) -> Snapshot:
+        return self._snapshot
+
+    @property
+    def high_water_mark(self) -> int:
+        df = self._snapshot.df
+        return int(df["visit_id"].max()) if len(df) else 0
+
+    def _read_new(self) -> pd.DataFrame | None:
+        # New rows since the last refresh, or None if the source was replaced
+        if os.path.isdir(self.path):
+            new_parts = sorted(set(partition_files(self.path)) - self._parts)
+            self._parts.update(new_parts)
+            if not new_parts:
+                return pd.DataFrame(columns=self._columns)
+            return pd.concat([read_visits(p) for p in new_parts], ignore_index=True)
+        if self.fmt == "csv":
+            if os.path.getsize(self.path) < self._offset:
+                return None  # truncated or rewritten
+            new, self._offset = read_csv_tail(self.path, self._offset, self._columns)
+            return new
+        mtime = os.path.getmtime(self.path)
+        if mtime == self._mtime:
+            return pd.DataFrame(columns=self._columns)
+        self._mtime = mtime
+        df = read_visits(self.path)
+        return df[df["visit_id"] > self.high_water_mark].reset_index(drop=True)
+
+    def refresh(self) -> int:
+        # Ingest anything appended since the last call; returns the row count added
+        with self._lock:
+            new = self._read_new()
+            if new is None:
+                self._load_full()
+                return len(self._snapshot.df)
+            new = new[new["visit_id"] > self.high_water_mark]
+            if new.empty:
+                return 0
+            new = sort_by_arrival(new.reset_index(drop=True))
+
+            snap = self._snapshot
+            df = pd.concat([snap.df, new], ignore_index=True)
+            if len(snap.df) and new["arrival_datetime"].iloc[0] < snap.df["arrival_datetime"].iloc[-1]:
+                # late-arriving rows break the time order: re-sort and rebuild
+                df = sort_by_arrival(df)
+                day_index, bitmap_index, cube = build_day_index(df), build_bitmap_index(df), build_cube(df)
+                sketches = build_sketches(df)
+                self._epoch += 1
+            else:
+                day_index = extend_day_index(snap.day_index, new)
+                bitmap_index = extend_bitmap_index(snap.bitmap_index, new)
+                cube = merge_cells(snap.cube, build_cube(new).cells)
+                sketches = merge_sketches(snap.sketches, build_sketches(new))
+            self._version += 1
+            self._snapshot = Snapshot(df, day_index, bitmap_index, cube, sketches, self._version, self._epoch)
+            return len(new)
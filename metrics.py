@@ -0,0 +1,189 @@
+# metrics.py
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from cube import rollup
+from filters import FilteredView, PackedRows, pack_rows
+from schema import METRICS
+
+LWBS = "Left Without Being Seen"
+ADMITTED = "Admitted"
+
+class KpiTotals(NamedTuple):
+    # Additive KPI state: means and rates are derived, so totals from disjoint
+    # row sets (days, cube cells, appended batches) combine with merge().
+    visits: int = 0
+    dtp_sum: float = 0.0
+    los_sum: float = 0.0
+    occ_sum: float = 0.0
+    lwbs: int = 0
+    admitted: int = 0
+
+    def merge(self, other: "KpiTotals") -> "KpiTotals":
+        return KpiTotals(*(a + b for a, b in zip(self, other)))
+
+    def _mean(self, total: float) -> float:
+        return total / self.visits if self.visits else float("nan")
+
+    @property
+    def avg_dtp(self) -> float:
+        return self._mean(self.dtp_sum)
+
+    @property
+    def avg_los(self) -> float:
+        return self._mean(self.los_sum)
+
+    @property
+    def avg_occ(self) -> float:
+        return self._mean(self.occ_sum)
+
+    @property
+    def lwbs_rate(self) -> float:
+        return self.lwbs / self.visits * 100 if self.visits else 0.0
+
+    @property
+    def admit_rate(self) -> float:
+        return self.admitted / self.visits * 100 if self.visits else 0.0
+
+def kpi_totals(dff: FilteredView) -> KpiTotals:
+    # One reduction per column over the raw NumPy buffers: integer sums in
+    # int64, occupancy in float64, and the LWBS / admitted counts straight off
+    # the 1-byte disposition codes (count_nonzero beats bincount, which first
+    # widens the codes to intp). No intermediate boolean Series or per-KPI mean.
+    disposition = dff["disposition"]
+    codes = disposition.cat.codes.to_numpy()
+    levels = list(disposition.cat.categories)
+    return KpiTotals(
+        visits=len(dff),
+        dtp_sum=float(np.sum(dff["door_to_provider_min"].to_numpy(), dtype=np.int64)),
+        los_sum=float(np.sum(dff["length_of_stay_min"].to_numpy(), dtype=np.int64)),
+        occ_sum=float(np.sum(dff["bed_occupancy_pct"].to_numpy(), dtype=np.float64)),
+        lwbs=int(np.count_nonzero(codes == levels.index(LWBS))),
+        admitted=int(np.count_nonzero(codes == levels.index(ADMITTED))),
+    )
+
+# Chart aggregates below roll up filtered cube cells (see cube.py), so their
+# cost tracks the number of cells in the filter, not the number of visits.
+
+def daily_trend(cells: FilteredView) -> pd.DataFrame:
+    return rollup(cells, ["arrival_date"]).rename(columns={
+        "mean_door_to_provider_min": "avg_door_to_provider",
+        "mean_length_of_stay_min": "avg_los",
+        "mean_bed_occupancy_pct": "avg_occ",
+    })
+
+def complaint_summary(cells: FilteredView) -> pd.DataFrame:
+    # Mean of every selectable bar metric per complaint, so switching the bar
+    # metric is a column pick rather than a new groupby.
+    by = rollup(cells, ["chief_complaint"])
+    return by[["chief_complaint", "visits"]].assign(**{m: by[f"mean_{m}"] for m in METRICS})
+
+DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+def dow_hour_wait(cells: FilteredView) -> pd.DataFrame:
+    # 7 x 24 mean door-to-provider from two bincounts over the slot code
+    # dow * 24 + hour (the cube's integer dow, no datetime or day-name work):
+    # visit counts and door-to-provider sums per slot. Empty slots are NaN.
+    slot = cells["dow"].to_numpy().astype(np.intp) * 24 + cells["hour"].to_numpy()
+    visits = np.bincount(slot, weights=cells["visits"].to_numpy(), minlength=7 * 24)
+    total = np.bincount(slot, weights=cells["door_to_provider_min_sum"].to_numpy(), minlength=7 * 24)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = (total / visits).reshape(7, 24)
+    return pd.DataFrame(
+        mean,
+        index=pd.Index(DAY_NAMES, name="dow"),
+        columns=pd.Index(range(24), name="hour"),
+    )
+
+# Binary splits compared by the Quick Insights: name -> rows where the split holds.
+# The occupancy cut is not a fixed split; see occupancy_sweep.
+# split name -> (column it reads, rows where it holds); a split whose column
+# is missing from the data is left out rather than raising
+INSIGHT_SPLITS = {
+    "flu_wave": ("flu_wave_flag", lambda col: col.to_numpy() == 1),
+    "weekend": ("is_weekend", lambda col: col.to_numpy() == 1),
+    "ambulance": ("arrival_mode", lambda col: col.cat.codes.to_numpy()
+                                              == list(col.cat.categories).index("Ambulance")),
+}
+
+def split_means(
+    dff: FilteredView,
+    value: str = "door_to_provider_min",
+    splits: dict = INSIGHT_SPLITS,
+) -> pd.DataFrame:
+    # Mean of `value` inside / outside every split from one pass: each row gets
+    # a code with bit k set when split k holds, and two bincounts over the codes
+    # (counts, sums) give every combination; a split's inside / outside totals
+    # are sums over the 2**k combinations, not new masks over the rows.
+    splits = {name: (col, holds) for name, (col, holds) in splits.items() if col in dff.columns}
+    code = np.zeros(len(dff), dtype=np.intp)
+    for k, (col, holds) in enumerate(splits.values()):
+        code |= holds(dff[col]).astype(np.intp) << k
+    size = 1 << len(splits)
+    n = np.bincount(code, minlength=size)
+    total = np.bincount(code, weights=dff[value].to_numpy(), minlength=size)
+    combos = np.arange(size)
+    rows = []
+    for k in range(len(splits)):
+        inside = (combos >> k) & 1 == 1
+        n_in, n_out = int(n[inside].sum()), int(n[~inside].sum())
+        mean_in = total[inside].sum() / n_in if n_in else float("nan")
+        mean_out = total[~inside].sum() / n_out if n_out else float("nan")
+        rows.append((n_in, n_out, mean_in, mean_out, mean_in - mean_out))
+    return pd.DataFrame(rows, index=list(splits), columns=["n_in", "n_out", "mean_in", "mean_out", "delta"])
+
+# Occupancy cuts offered by the crowding insight (integer %)
+SWEEP_THRESHOLDS = np.arange(60, 99)
+
+def occupancy_sweep(
+    dff: FilteredView,
+    value: str = "door_to_provider_min",
+    thresholds: np.ndarray = SWEEP_THRESHOLDS,
+) -> pd.DataFrame:
+    # Mean `value` at / above vs below every occupancy threshold from one sort:
+    # with the rows ordered by occupancy, each threshold is a split point
+    # (searchsorted) and both sides' sums come from one cumulative sum.
+    occ = dff["bed_occupancy_pct"].to_numpy()
+    order = np.argsort(occ, kind="stable")
+    csum = np.concatenate([[0.0], np.cumsum(dff[value].to_numpy()[order], dtype=np.float64)])
+    split = np.searchsorted(occ[order], thresholds, side="left")
+    n, n_low = len(occ), split
+    n_high = n - split
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_low = csum[split] / n_low
+        mean_high = (csum[-1] - csum[split]) / n_high
+    return pd.DataFrame({
+        "threshold": thresholds,
+        "n_high": n_high,
+        "n_low": n_low,
+        "mean_high": mean_high,
+        "mean_low": mean_low,
+        "delta": mean_high - mean_low,
+    })
+
+class FilterResult(NamedTuple):
+    # Everything a rerun needs for one filter state; cached by the normalized key
+    rows: slice | PackedRows  # select_rows result, packed (FilteredView unpacks it)
+    kpis: KpiTotals
+    trend: pd.DataFrame
+    by_complaint: pd.DataFrame
+    heat: pd.DataFrame
+    sketch: np.ndarray  # merged quantile sketch counts, see sketch.py
+    insights: pd.DataFrame  # door-to-provider split_means for INSIGHT_SPLITS
+    sweep: pd.DataFrame  # door-to-provider occupancy_sweep
+
+def summarize(dff: FilteredView, cells: FilteredView, sketch: np.ndarray) -> FilterResult:
+    # dff: the filtered visits; cells: the same filter applied to the cube;
+    # sketch: the filter's merged sketch counts (sketch.sketch_counts)
+    return FilterResult(
+        rows=pack_rows(dff.rows),
+        kpis=kpi_totals(dff),
+        trend=daily_trend(cells),
+        by_complaint=complaint_summary(cells),
+        heat=dow_hour_wait(cells),
+        sketch=sketch,
+        insights=split_means(dff),
+        sweep=occupancy_sweep(dff),
+    )
@@ -0,0 +1,143 @@
+# plots.py
+import hashlib
+import threading
+import time
+from collections.abc import Callable, Hashable
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from cache import LRUCache
+from filters import FilteredView
+
+def stratified_sample(dff: FilteredView, size: int, by: str = "triage_level", seed: int = 7) -> np.ndarray:
+    # About size positions (relative to the view), allocated to each value of
+    # `by` in proportion to its share of the rows (at least one per non-empty
+    # value, so rare triage levels stay visible). Only the 1-byte codes of `by`
+    # are read and each draw is over one stratum, not a permutation of the view.
+    codes = dff[by].cat.codes.to_numpy()
+    if len(codes) <= size:
+        return np.arange(len(codes))
+    rng = np.random.default_rng(seed)
+    counts = np.bincount(codes[codes >= 0])
+    quota = np.minimum(counts, np.maximum(np.floor(counts * size / len(codes)), counts > 0)).astype(np.int64)
+    picks = []
+    for code in np.flatnonzero(quota):
+        members = np.flatnonzero(codes == code)
+        picks.append(members[rng.choice(len(members), size=quota[code], replace=False)])
+    return np.sort(np.concatenate(picks))
+
+def density_grid(x: pd.Series, y: pd.Series, bins: int = 60) -> pd.DataFrame:
+    # 2-D histogram of (x, y) as a bins x bins frame of counts, rows indexed by
+    # y-bin centres and columns by x-bin centres, ready for px.imshow. The
+    # payload is fixed by `bins`, however many rows went in.
+    counts, x_edges, y_edges = np.histogram2d(x.to_numpy(dtype=np.float64), y.to_numpy(dtype=np.float64), bins=bins)
+    return pd.DataFrame(
+        counts.T,
+        index=pd.Index(np.round((y_edges[:-1] + y_edges[1:]) / 2, 1), name=y.name),
+        columns=pd.Index(np.round((x_edges[:-1] + x_edges[1:]) / 2, 1), name=x.name),
+    )
+
+def binned_counts(values: pd.Series, bins: int = 40) -> pd.DataFrame:
+    # Server-side histogram: one row per bin (left edge, right edge, centre,
+    # count), so the figure carries bins values instead of every visit.
+    counts, edges = np.histogram(values.to_numpy(), bins=bins)
+    return pd.DataFrame({
+        "left": edges[:-1],
+        "right": edges[1:],
+        "mid": (edges[:-1] + edges[1:]) / 2,
+        "count": counts,
+    })
+
+def figure_bytes(fig: go.Figure) -> int:
+    # Size of the figure JSON that st.plotly_chart sends to the browser
+    return len(pio.to_json(fig, validate=False).encode())
+
+def frame_digest(df: pd.DataFrame) -> str:
+    # Content hash of a (small, aggregated) chart input, columns included
+    values = pd.util.hash_pandas_object(df, index=True).to_numpy()
+    h = hashlib.blake2b(values.tobytes(), digest_size=16)
+    h.update(repr(list(df.columns)).encode())
+    return h.hexdigest()
+
+class FigureCache:
+    # Built figures shared across reruns and sessions, keyed by chart name plus
+    # whatever identifies its input (aggregate digest or filter key) and
+    # options, with hit / miss counts per chart. Figures are treated as
+    # read-only once cached.
+    def __init__(self, max_entries: int = 128):
+        self._cache = LRUCache(max_entries=max_entries)
+        self._lock = threading.Lock()
+        self._counts: dict[str, list[int]] = {}
+
+    def get_or_build(self, name: str, key: Hashable, build: Callable[[], object]) -> tuple[object, bool]:
+        hit = True
+
+        def miss():
+            nonlocal hit
+            hit = False
+            return build()
+
+        value = self._cache.get_or_compute((name, key), miss)
+        with self._lock:
+            self._counts.setdefault(name, [0, 0])[0 if hit else 1] += 1
+        return value, hit
+
+    def stats(self) -> pd.DataFrame:
+        with self._lock:
+            rows = [(name, h, m, h / (h + m)) for name, (h, m) in self._counts.items()]
+        return pd.DataFrame(rows, columns=["chart", "hits", "misses", "hit_rate"])
+
+class FigureLog:
+    # Build time and payload size of each chart drawn in a rerun, keyed by
+    # chart name, with a per-figure payload budget: a figure over budget is
+    # replaced by its aggregated / downsampled fallback when it has one. With a
+    # FigureCache and a key, an unchanged chart is reused instead of rebuilt.
+    def __init__(self, budget_bytes: int, cache: FigureCache | None = None):
+        self.budget_bytes = budget_bytes
+        self.cache = cache
+        self._charts: dict[str, dict] = {}
+
+    def _make_within_budget(
+        self,
+        make: Callable[[], go.Figure],
+        fallback: Callable[[], go.Figure] | None,
+    ) -> tuple[go.Figure, int, str]:
+        fig = make()
+        size = figure_bytes(fig)
+        status = "ok"
+        if size > self.budget_bytes:
+            status = "over budget"
+            if fallback is not None:
+                fig = fallback()
+                size = figure_bytes(fig)
+                status = "fallback"
+        return fig, size, status
+
+    def build(
+        self,
+        name: str,
+        make: Callable[[], go.Figure],
+        fallback: Callable[[], go.Figure] | None = None,
+        key: Hashable | None = None,
+    ) -> go.Figure:
+        t0 = time.perf_counter()
+        if self.cache is None or key is None:
+            (fig, size, status), cached = self._make_within_budget(make, fallback), False
+        else:
+            (fig, size, status), cached = self.cache.get_or_build(
+                name, key, lambda: self._make_within_budget(make, fallback),
+            )
+        self._charts[name] = {
+            "chart": name,
+            "build_ms": (time.perf_counter() - t0) * 1e3,
+            "kb": size / 1024,
+            "status": status,
+            "cached": cached,
+        }
+        return fig
+
+    def frame(self) -> pd.DataFrame:
+        return pd.DataFrame(list(self._charts.values()), columns=["chart", "build_ms", "kb", "status", "cached"])
@@ -0,0 +1,74 @@
+# profiler.py
+import cProfile
+import io
+import pstats
+import time
+
+import pandas as pd
+import plotly.graph_objects as go
+
+class RerunProfiler:
+    # Wall-clock spans of the named sections of one script run. mark(name)
+    # closes the open span and starts the next, so sections are marked where
+    # they begin without re-indenting them; a disabled profiler does nothing.
+    # With cprofile=True the whole run is also captured by cProfile. Once stopped
+    # it ignores further marks, e.g. from a fragment-only rerun, which runs only
+    # the fragment body against the profiler of the last full run.
+    def __init__(self, enabled: bool, cprofile: bool = False):
+        self.enabled = enabled
+        self.t0 = time.perf_counter()
+        self._open: tuple[str, float] | None = None
+        self._stopped = False
+        self._spans: dict[str, tuple[float, float]] = {}
+        self._cprofile = cProfile.Profile() if enabled and cprofile else None
+        if self._cprofile is not None:
+            self._cprofile.enable()
+
+    def mark(self, name: str) -> None:
+        if not self.enabled or self._stopped:
+            return
+        now = time.perf_counter()
+        if self._open is not None:
+            self._spans[self._open[0]] = (self._open[1], now)
+        self._open = (name, now)
+
+    def stop(self) -> None:
+        if not self.enabled or self._stopped:
+            return
+        self._stopped = True
+        if self._open is not None:
+            self._spans[self._open[0]] = (self._open[1], time.perf_counter())
+            self._open = None
+        if self._cprofile is not None:
+            self._cprofile.disable()
+
+    def frame(self) -> pd.DataFrame:
+        rows = [(name, (a - self.t0) * 1e3, (b - a) * 1e3) for name, (a, b) in self._spans.items()]
+        return pd.DataFrame(rows, columns=["section", "start_ms", "ms"]).sort_values("start_ms", ignore_index=True)
+
+    def cprofile_text(self, limit: int = 30) -> str | None:
+        # Top functions by cumulative time, or None when cProfile was off
+        if self._cprofile is None:
+            return None
+        out = io.StringIO()
+        pstats.Stats(self._cprofile, stream=out).sort_stats("cumulative").print_stats(limit)
+        return out.getvalue()
+
+def waterfall_figure(spans: pd.DataFrame) -> go.Figure:
+    # One bar per section, offset by its start within the run
+    fig = go.Figure(go.Bar(
+        y=spans["section"],
+        x=spans["ms"],
+        base=spans["start_ms"],
+        orientation="h",
+        text=[f"{ms:,.1f} ms" for ms in spans["ms"]],
+        textposition="outside",
+    ))
+    fig.update_layout(
+        title="Rerun waterfall",
+        xaxis_title="ms since script start",
+        yaxis=dict(autorange="reversed"),
+        margin=dict(l=10, r=10, t=50, b=10),
+        height=60 + 28 * len(spans),
+    )
+    return fig
@@ -0,0 +1,70 @@
+# schema.py
+import pandas as pd
+
+# Fixed category levels for the visit attributes. Declaring them (instead of
+# inferring from whatever rows happen to be present) keeps codes identical
+# across chunks, shards and files, so Parquet/Feather dictionaries line up.
+CATEGORIES = {
+    "day_of_week": ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"],
+    "triage_level": [1, 2, 3, 4, 5],
+    "chief_complaint": ["Chest Pain", "Abdominal Pain", "Injury", "Fever/Resp", "Headache", "Other"],
+    "age_group": ["0-17", "18-34", "35-49", "50-64", "65+"],
+    "arrival_mode": ["Ambulance", "Walk-in"],
+    "pod": ["Pod A", "Pod B", "Pod C"],
+    "disposition": ["Admitted", "Discharged", "Left Without Being Seen"],
+}
+
+# Declared dtypes for every column of the visits table. Small ints are sized to
+# their ranges (hour 0-23, door-to-provider 2-240, LOS 25-900, 0/1 flags),
+# occupancy is a 0.1-resolution percentage, and arrival_date is the arrival
+# day at midnight as datetime64 rather than Python date objects.
+SCHEMA = {
+    "visit_id": "int64",
+    "arrival_datetime": "datetime64[ns]",
+    "day_of_week": pd.CategoricalDtype(CATEGORIES["day_of_week"], ordered=True),
+    "hour": "int8",
+    "triage_level": pd.CategoricalDtype(CATEGORIES["triage_level"], ordered=True),
+    "chief_complaint": pd.CategoricalDtype(CATEGORIES["chief_complaint"]),
+    "age_group": pd.CategoricalDtype(CATEGORIES["age_group"], ordered=True),
+    "arrival_mode": pd.CategoricalDtype(CATEGORIES["arrival_mode"]),
+    "pod": pd.CategoricalDtype(CATEGORIES["pod"]),
+    "labs_ordered": "int8",
+    "imaging_ordered": "int8",
+    "bed_occupancy_pct": "float32",
+    "door_to_provider_min": "int16",
+    "length_of_stay_min": "int16",
+    "disposition": pd.CategoricalDtype(CATEGORIES["disposition"]),
+    "flu_wave_flag": "int8",
+    "arrival_date": "datetime64[ns]",
+    "is_weekend": "int8",
+}
+
+DATE_COLUMNS = ["arrival_datetime", "arrival_date"]
+
+# Numeric per-visit measures the dashboard averages
+METRICS = ["door_to_provider_min", "length_of_stay_min", "bed_occupancy_pct"]
+
+def csv_dtypes() -> dict:
+    # dtype= mapping for pd.read_csv; the date columns go through parse_dates instead
+    return {col: dtype for col, dtype in SCHEMA.items() if col not in DATE_COLUMNS}
+
+def apply_schema(df: pd.DataFrame) -> pd.DataFrame:
+    for col, dtype in SCHEMA.items():
+        if col not in df.columns:
+            continue
+        if col == "arrival_date":
+            # older files store the day as date objects or ISO strings
+            df[col] = pd.to_datetime(df[col]).dt.normalize().astype(dtype)
+        elif df[col].dtype != dtype:
+            df[col] = df[col].astype(dtype)
+    return df
+
+def memory_report(before: pd.DataFrame, after: pd.DataFrame) -> pd.DataFrame:
+    # Per-column deep memory (MB) of two versions of the same table, plus the ratio.
+    report = pd.DataFrame({
+        "before_mb": before.memory_usage(deep=True, index=False) / 2**20,
+        "after_mb": after.memory_usage(deep=True, index=False) / 2**20,
+    })
+    report.loc["TOTAL"] = report.sum()
+    report["ratio"] = report["before_mb"] / report["after_mb"]
+    return report.round(2)
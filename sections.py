@@ -0,0 +1,202 @@
+# sections.py
+# The data and figure work behind each app.py section as plain functions, so
+# a rerun's pieces can be timed (benchmarks/, the rerun profiler) without a
+# Streamlit server. app.py only adds widgets, layout and caching around them.
+import datetime as dt
+
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+from census import census_window, pod_census
+from cube import cube_cells
+from filters import FilteredView, select_rows
+from ingest import Snapshot
+from metrics import FilterResult, summarize
+from plots import binned_counts, density_grid, stratified_sample
+from sketch import sketch_counts
+
+MARGIN = dict(l=10, r=10, t=50, b=10)
+
+def filter_result(snapshot: Snapshot, start: dt.date, end: dt.date, selections: dict[str, list]) -> FilterResult:
+    rows = select_rows(snapshot.day_index, snapshot.bitmap_index, start, end, selections)
+    return summarize(
+        FilteredView(snapshot.df, rows),
+        cube_cells(snapshot.cube, start, end, selections),
+        sketch_counts(snapshot.sketches, start, end, selections),
+    )
+
+# 1) Line chart: trend by day (distinct question: trend)
+TREND_Y = {
+    "door_to_provider_min": ("avg_door_to_provider", "Avg Door→Provider (min)"),
+    "length_of_stay_min": ("avg_los", "Avg LOS (min)"),
+    "bed_occupancy_pct": ("avg_occ", "Avg Occupancy (%)"),
+}
+
+def trend_figure(trend: pd.DataFrame, metric: str) -> go.Figure:
+    y_col, y_label = TREND_Y[metric]
+    fig = px.line(
+        trend,
+        x="arrival_date",
+        y=y_col,
+        markers=True,
+        title=f"Daily Trend: {y_label}",
+    )
+    fig.update_layout(margin=MARGIN, height=380)
+    return fig
+
+# 2) Bar chart: comparison by chief complaint (distinct question: which categories drive LOS/waits)
+def bar_frame(by_complaint: pd.DataFrame, metric: str) -> pd.DataFrame:
+    return (
+        by_complaint[["chief_complaint", metric, "visits"]]
+            .rename(columns={metric: "value"})
+            .sort_values("value", ascending=False)
+    )
+
+def bar_figure(bar_df: pd.DataFrame, metric: str) -> go.Figure:
+    fig = px.bar(
+        bar_df,
+        x="chief_complaint",
+        y="value",
+        hover_data=["visits"],
+        title=f"Comparison by Chief Complaint: Avg {metric}",
+    )
+    fig.update_layout(margin=MARGIN, height=380)
+    return fig
+
+# 3) Scatter: relationship occupancy vs wait (distinct question: is crowding linked to delays)
+def scatter_density_figure(dff: FilteredView) -> go.Figure:
+    # Fixed-size 2-D histogram: the payload does not depend on the number of visits
+    density = density_grid(dff["bed_occupancy_pct"], dff["door_to_provider_min"])
+    fig = px.imshow(
+        density,
+        origin="lower",
+        aspect="auto",
+        color_continuous_scale="Blues",
+        labels=dict(color="visits"),
+        title="Crowding Relationship: Occupancy vs Door→Provider (density)",
+    )
+    fig.update_layout(margin=MARGIN, height=380)
+    return fig
+
+def scatter_points_figure(dff: FilteredView, max_points: int) -> go.Figure:
+    scatter_cols = ["bed_occupancy_pct", "door_to_provider_min", "triage_level",
+                    "chief_complaint", "arrival_mode", "pod", "disposition"]
+    sample = dff.take(stratified_sample(dff, max_points), scatter_cols)
+    fig = px.scatter(
+        sample,
+        x="bed_occupancy_pct",
+        y="door_to_provider_min",
+        color="triage_level",
+        title="Crowding Relationship: Occupancy vs Door→Provider",
+        opacity=0.65,
+        hover_data=["chief_complaint", "arrival_mode", "pod", "disposition"],
+    )
+    fig.update_layout(margin=MARGIN, height=380)
+    return fig
+
+# 4) Histogram: distribution (distinct question: outliers vs broad shift)
+def hist_figure(dff: FilteredView) -> go.Figure:
+    # Binned here with np.histogram; the figure only carries the 40 bar heights
+    los_bins = binned_counts(dff["length_of_stay_min"], bins=40)
+    fig = px.bar(
+        los_bins,
+        x="mid",
+        y="count",
+        hover_data=["left", "right"],
+        labels={"mid": "length_of_stay_min"},
+        title="LOS Distribution (min)",
+    )
+    fig.update_traces(width=los_bins["right"] - los_bins["left"])
+    fig.update_layout(margin=MARGIN, height=380, bargap=0)
+    return fig
+
+# 5) Heatmap of mean wait by day/hour (nice for staffing)
+def heat_figure(pivot: pd.DataFrame) -> go.Figure:
+    fig = px.imshow(
+        pivot,
+        aspect="auto",
+        title="Mean Door→Provider (min) by Day of Week × Hour",
+    )
+    fig.update_layout(margin=MARGIN, height=420)
+    return fig
+
+# Census: patients in the department over time (from arrival + LOS, not the occupancy snapshot)
+def census_frame(
+    snapshot: Snapshot,
+    start: dt.date,
+    end: dt.date,
+    selections: dict[str, list],
+    step_min: int,
+) -> pd.DataFrame:
+    # Includes visits that arrived before start but were still in the department
+    df = snapshot.df
+    lo, hi = census_window(start, end, int(df["length_of_stay_min"].max()))
+    rows = select_rows(snapshot.day_index, snapshot.bitmap_index, lo, hi, selections)
+    return pod_census(FilteredView(df, rows), start, end, step_min, selections.get("pod"))
+
+def census_figure(census: pd.DataFrame) -> go.Figure:
+    fig = px.line(
+        census,
+        x="time",
+        y="census",
+        color="pod",
+        title="Concurrent Census (patients present)",
+    )
+    fig.update_layout(margin=MARGIN, height=380)
+    return fig
+
+# Crowding: the door-to-provider gap at every occupancy cut (metrics.occupancy_sweep)
+def sweep_figure(sweep: pd.DataFrame, threshold: int) -> go.Figure:
+    fig = make_subplots(specs=[[{"secondary_y": True}]])
+    fig.add_bar(x=sweep["threshold"], y=sweep["n_high"], name="visits at/above", opacity=0.3, secondary_y=True)
+    fig.add_scatter(
+        x=sweep["threshold"],
+        y=sweep["delta"],
+        mode="lines+markers",
+        name="door→provider gap (min)",
+        customdata=sweep[["n_high", "n_low"]],
+        hovertemplate="≥ %{x}%: %{y:.1f} min<br>%{customdata[0]:,} at/above · %{customdata[1]:,} below<extra></extra>",
+        secondary_y=False,
+    )
+    fig.add_vline(x=threshold, line_dash="dot")
+    fig.update_layout(
+        title="Door→Provider Gap (at/above vs below threshold) by Occupancy Threshold",
+        margin=MARGIN,
+        height=340,
+        xaxis_title="occupancy threshold (%)",
+    )
+    fig.update_yaxes(title_text="gap (min)", secondary_y=False)
+    fig.update_yaxes(title_text="visits at/above", secondary_y=True)
+    return fig
+
+# ---- Insight callouts ----
+INSIGHT_TEXT = {
+    "flu_wave": ("During the **flu-wave window**", "outside the window"),
+    "weekend": ("On **weekends**", "on weekdays"),
+    "ambulance": ("For **ambulance arrivals**", "for walk-ins"),
+}
+# Smallest share of the filtered visits inside a split for its callout (the
+# flu-wave line only shows when more than 5% of visits fall in the window)
+INSIGHT_MIN_SHARE = {"flu_wave": 0.05}
+
+def _gap(lead: str, delta: float, other: str) -> str:
+    return (
+        f"- {lead}, average door→provider is **{abs(delta):,.1f} minutes "
+        f"{'higher' if delta >= 0 else 'lower'}** than {other}."
+    )
+
+def insight_lines(result: FilterResult, threshold: int) -> list[str]:
+    # Bullets from the cached sweep and split tables; each needs > 30 visits per
+    # side, plus the split's INSIGHT_MIN_SHARE of the visits where one is set
+    lines = []
+    cut = result.sweep.set_index("threshold").loc[threshold]
+    if cut["n_high"] > 30 and cut["n_low"] > 30:
+        lines.append(_gap(f"When **occupancy ≥ {threshold}%**", cut["delta"], f"when occupancy < {threshold}%"))
+    for name, split in result.insights.iterrows():
+        share = split["n_in"] / (split["n_in"] + split["n_out"])
+        if split["n_in"] > 30 and split["n_out"] > 30 and share > INSIGHT_MIN_SHARE.get(name, 0.0):
+            lead, other = INSIGHT_TEXT[name]
+            lines.append(_gap(lead, split["delta"], other))
+    return lines
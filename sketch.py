@@ -0,0 +1,124 @@
+# sketch.py
+import datetime as dt
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from filters import (
+    FILTER_COLUMNS, BitmapIndex, DayIndex, FilteredView, build_bitmap_index, build_day_index, fold_day_tail,
+    select_rows,
+)
+
+# Mergeable quantile sketches for the wait / stay metrics (DDSketch-style
+# log buckets). A value v >= 1 goes to bucket ceil(log_gamma(v)) with
+# gamma = (1 + a) / (1 - a), and a bucket reads back as 2 * gamma**b / (gamma + 1).
+# Every value in a bucket is within relative error a of that read-back, so a
+# quantile from the merged counts is within a of the exact order statistic
+# (np.quantile(..., method="lower")) for any filter and any number of merges.
+# Counts are plain integers: sketches of disjoint row sets combine by addition.
+SKETCH_ALPHA = 0.02
+SKETCH_GAMMA = (1 + SKETCH_ALPHA) / (1 - SKETCH_ALPHA)
+SKETCH_METRICS = ["door_to_provider_min", "length_of_stay_min"]
+SKETCH_BUCKETS = int(np.ceil(np.log(np.iinfo(np.int16).max) / np.log(SKETCH_GAMMA))) + 1
+QUANTILES = [0.5, 0.9, 0.95]
+
+# Sketches are kept per (day, triage, complaint, mode, pod): the dimensions the
+# sidebar filters on, so any filter state selects whole sketch groups.
+SKETCH_GRAIN = ["arrival_date", *FILTER_COLUMNS]
+
+class SketchTable(NamedTuple):
+    # entries: one row per non-empty (grain, metric, bucket) with its count,
+    # day-sorted, with the same day / bitmap indexes the visits and cube use.
+    entries: pd.DataFrame
+    day_index: DayIndex
+    bitmap_index: BitmapIndex
+
+def bucket_of(values: np.ndarray) -> np.ndarray:
+    v = np.maximum(values.astype(np.float64), 1.0)
+    return np.minimum(np.ceil(np.log(v) / np.log(SKETCH_GAMMA)), SKETCH_BUCKETS - 1).astype(np.int16)
+
+def bucket_value(buckets: np.ndarray) -> np.ndarray:
+    return 2 * SKETCH_GAMMA ** buckets.astype(np.float64) / (SKETCH_GAMMA + 1)
+
+def _table(entries: pd.DataFrame) -> SketchTable:
+    return SketchTable(entries, build_day_index(entries), build_bitmap_index(entries))
+
+def build_sketches(df: pd.DataFrame) -> SketchTable:
+    # The visits are day-sorted, so each day is one bincount over the dense
+    # (dimensions, metric, bucket) key space; only non-zero counts are kept.
+    dims = [df[col].cat.codes.to_numpy().astype(np.int64) for col in FILTER_COLUMNS]
+    sizes = [len(df[col].cat.categories) for col in FILTER_COLUMNS]
+    group = np.zeros(len(df), dtype=np.int64)
+    for code, size in zip(dims, sizes):
+        group = group * size + code
+    n_groups = int(np.prod(sizes))
+    width = len(SKETCH_METRICS) * SKETCH_BUCKETS
+    keys = [
+        group * width + m * SKETCH_BUCKETS + bucket_of(df[col].to_numpy())
+        for m, col in enumerate(SKETCH_METRICS)
+    ]
+
+    day_index = build_day_index(df)
+    days, cell_keys, counts = [], [], []
+    for i, day in enumerate(day_index.days):
+        lo, hi = day_index.offsets[i], day_index.offsets[i + 1]
+        per_key = sum(np.bincount(k[lo:hi], minlength=n_groups * width) for k in keys)
+        nonzero = np.flatnonzero(per_key)
+        days.append(np.full(len(nonzero), day))
+        cell_keys.append(nonzero)
+        counts.append(per_key[nonzero])
+    key = np.concatenate(cell_keys) if cell_keys else np.zeros(0, dtype=np.int64)
+
+    rem, bucket = np.divmod(key, SKETCH_BUCKETS)
+    rem, metric = np.divmod(rem, len(SKETCH_METRICS))
+    cols = {}
+    for col, size in zip(reversed(FILTER_COLUMNS), reversed(sizes)):
+        rem, code = np.divmod(rem, size)
+        cols[col] = pd.Categorical.from_codes(code, dtype=df[col].dtype)
+    entries = pd.DataFrame({
+        "arrival_date": np.concatenate(days) if days else np.zeros(0, dtype="datetime64[ns]"),
+        **{col: cols[col] for col in FILTER_COLUMNS},
+        "metric": metric.astype(np.int8),
+        "bucket": bucket.astype(np.int16),
+        "count": np.concatenate(counts) if counts else np.zeros(0, dtype=np.int64),
+    })
+    return _table(entries)
+
+def merge_sketches(table: SketchTable, new: SketchTable) -> SketchTable:
+    # Add newly built sketch counts (of visits appended in time order) into
+    # existing ones; only entries from the first new day on are re-grouped
+    entries, day_index, bitmap_index = fold_day_tail(
+        table.entries, table.day_index, table.bitmap_index, new.entries,
+        [*SKETCH_GRAIN, "metric", "bucket"], ["count"],
+    )
+    return SketchTable(entries, day_index, bitmap_index)
+
+def sketch_counts(table: SketchTable, start: dt.date, end: dt.date, selections: dict[str, list]) -> np.ndarray:
+    # Merged sketch of the filter: (len(SKETCH_METRICS), SKETCH_BUCKETS) counts,
+    # from the selected sketch entries only; raw visits are not read.
+    entries = FilteredView(table.entries, select_rows(table.day_index, table.bitmap_index, start, end, selections))
+    key = entries["metric"].to_numpy().astype(np.intp) * SKETCH_BUCKETS + entries["bucket"].to_numpy()
+    counts = np.bincount(key, weights=entries["count"].to_numpy(), minlength=len(SKETCH_METRICS) * SKETCH_BUCKETS)
+    return counts.astype(np.int64).reshape(len(SKETCH_METRICS), SKETCH_BUCKETS)
+
+def visit_sketch(dff: FilteredView) -> np.ndarray:
+    # Sketch counts straight from visits (e.g. rows appended since the last
+    # full refresh), in the same shape as sketch_counts so the two add up.
+    return np.stack([
+        np.bincount(bucket_of(dff[col].to_numpy()), minlength=SKETCH_BUCKETS)
+        for col in SKETCH_METRICS
+    ]).astype(np.int64)
+
+def sketch_quantiles(counts: np.ndarray, quantiles: list[float] = QUANTILES) -> pd.DataFrame:
+    # Quantiles per metric (rows) from merged counts; NaN for an empty sketch
+    out = {}
+    for m, col in enumerate(SKETCH_METRICS):
+        cum = np.cumsum(counts[m])
+        n = int(cum[-1])
+        if n == 0:
+            out[col] = [np.nan] * len(quantiles)
+            continue
+        ranks = np.floor(np.asarray(quantiles) * (n - 1))
+        out[col] = bucket_value(np.searchsorted(cum, ranks, side="right"))
+    return pd.DataFrame(out, index=[f"p{round(q * 100)}" for q in quantiles]).T
@@ -0,0 +1,151 @@
+# storage.py
+import glob
+import io
+import os
+from collections.abc import Iterable
+
+import pandas as pd
+
+from schema import apply_schema, csv_dtypes
+
+# On-disk formats for the visits table. Parquet and Feather (Arrow IPC) need
+# pyarrow; CSV works with pandas alone.
+EXTENSIONS = {
+    ".csv": "csv",
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".feather": "feather",
+    ".arrow": "feather",
+    ".ipc": "feather",
+}
+SUFFIX = {"csv": ".csv", "parquet": ".parquet", "feather": ".feather"}
+
+def format_for_path(path: str) -> str:
+    return EXTENSIONS.get(os.path.splitext(path)[1].lower(), "csv")
+
+def detect_format(path: str) -> str:
+    # Sniff magic bytes so a mislabelled file still loads; fall back to the extension.
+    if os.path.isdir(path):
+        return detect_format(partition_files(path)[0])
+    with open(path, "rb") as f:
+        head = f.read(8)
+    if head[:4] == b"PAR1":
+        return "parquet"
+    if head[:6] == b"ARROW1" or head[:4] == b"FEA1":
+        return "feather"
+    return format_for_path(path)
+
+def partition_files(directory: str) -> list[str]:
+    parts = sorted(glob.glob(os.path.join(directory, "part-*")))
+    if not parts:
+        raise FileNotFoundError(f"no part-* files in {directory}")
+    return parts
+
+def _read_one(path: str, fmt: str) -> pd.DataFrame:
+    if fmt == "parquet":
+        return pd.read_parquet(path)
+    if fmt == "feather":
+        return pd.read_feather(path)
+    return pd.read_csv(path, parse_dates=["arrival_datetime"], dtype=csv_dtypes())
+
+def read_visits(path: str) -> pd.DataFrame:
+    # Accepts a single file in any supported format, or a directory of part-* shards.
+    fmt = detect_format(path)
+    if os.path.isdir(path):
+        df = pd.concat([_read_one(p, fmt) for p in partition_files(path)], ignore_index=True)
+    else:
+        df = _read_one(path, fmt)
+    return apply_schema(df)
+
+class _ByteRange(io.RawIOBase):
+    # Read-only view of a file from its current position up to byte end, so a
+    # parse never sees bytes appended after the caller sized the file
+    def __init__(self, f, end: int):
+        self._f = f
+        self._left = end - f.tell()
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        n = self._f.readinto(memoryview(b)[:max(self._left, 0)])
+        self._left -= n
+        return n
+
+def _complete_end(path: str, offset: int, size: int, block: int = 1 << 16) -> int:
+    # Byte just past the last newline in [offset, size), or offset if there is
+    # none; scans backwards from size, so only the last line is read.
+    with open(path, "rb") as f:
+        hi = size
+        while hi > offset:
+            lo = max(offset, hi - block)
+            f.seek(lo)
+            i = f.read(hi - lo).rfind(b"\n")
+            if i >= 0:
+                return lo + i + 1
+            hi = lo
+    return offset
+
+def _read_csv_range(path: str, start: int, end: int, columns: list[str] | None) -> pd.DataFrame:
+    # Rows in bytes [start, end); with columns=None the range starts at the header
+    with open(path, "rb") as f:
+        f.seek(start)
+        df = pd.read_csv(
+            io.BufferedReader(_ByteRange(f, end)),
+            header=0 if columns is None else None, names=columns,
+            parse_dates=["arrival_datetime"], dtype=csv_dtypes(),
+        )
+    return apply_schema(df)
+
+def read_csv_head(path: str) -> tuple[pd.DataFrame, int]:
+    # First load of a CSV that may be appended to: the file is sized once and
+    # only the complete lines within that size are parsed; returns the rows and
+    # the offset read_csv_tail resumes from. A partial last line is left for it.
+    end = _complete_end(path, 0, os.path.getsize(path))
+    return _read_csv_range(path, 0, end, None), end
+
+def read_csv_tail(path: str, offset: int, columns: list[str]) -> tuple[pd.DataFrame, int]:
+    # Parse only the complete lines appended after byte offset; returns the new
+    # rows and the offset to resume from. A trailing partial line (a writer
+    # mid-append) is left for the next call.
+    end = _complete_end(path, offset, os.path.getsize(path))
+    if end == offset:
+        return pd.DataFrame(columns=columns), offset
+    return _read_csv_range(path, offset, end, columns), end
+
+def write_visits(df: pd.DataFrame, path: str, fmt: str | None = None, header: bool = True) -> None:
+    fmt = fmt or format_for_path(path)
+    if fmt == "parquet":
+        df.to_parquet(path, index=False)
+    elif fmt == "feather":
+        df.reset_index(drop=True).to_feather(path)
+    else:
+        df.to_csv(path, header=header, index=False)
+
+def write_chunks(chunks: Iterable[pd.DataFrame], path: str, fmt: str | None = None) -> int:
+    # Streams frames into a single file: appended CSV, Parquet row groups, or
+    # Arrow IPC record batches. Only one chunk is held in memory at a time.
+    fmt = fmt or format_for_path(path)
+    rows = 0
+    writer = None
+    try:
+        for i, chunk in enumerate(chunks):
+            if fmt == "csv":
+                chunk.to_csv(path, mode="w" if i == 0 else "a", header=(i == 0), index=False)
+            else:
+                import pyarrow as pa
+
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    if fmt == "parquet":
+                        import pyarrow.parquet as pq
+
+                        writer = pq.ParquetWriter(path, table.schema)
+                    else:
+                        writer = pa.ipc.new_file(path, table.schema)
+                writer.write_table(table)
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows